@@ -1,33 +1,191 @@
 import random
+from functools import lru_cache
 
 def format_output(data, block_size=8):
     """Форматирует вывод данных, разбивая их на блоки по block_size символов"""
     return ' '.join([data[i:i+block_size] for i in range(0, len(data), block_size)])
 
+""" Кодек Хэмминга над целыми числами: бит j-1 числа — позиция j кодового слова """
+class HammingCodec:
+    def __init__(self, data_bits):
+        r = 0                           # Число контрольных битов
+        while 2 ** r <= data_bits + r:  # Столько же, сколько вставляет insert_parity_bits
+            r += 1
+        self._build(data_bits + r)
+
+    @classmethod
+    def for_length(cls, length):
+        """Кодек для кодового слова заданной длины (как у строковых функций)"""
+        codec = cls.__new__(cls)
+        codec._build(length)
+        return codec
+
+    def _build(self, length):
+        self.length = length    # Длина кодового слова
+        # Контрольные позиции 2^i < length и маски их областей контроля
+        self.parity_positions = []
+        self.masks = []
+        i = 0
+        while 2 ** i < length:
+            self.parity_positions.append(2 ** i)
+            # Область контроля 2^i — позиции j с j & 2^i: начиная с позиции 2^i чередуются
+            # 2^i входящих и 2^i не входящих позиций. Маска строится одной строкой битов
+            step = 2 ** i
+            pattern = "0" * (step - 1) + ("1" * step + "0" * step) * (length // (2 * step) + 1)
+            self.masks.append(bits_to_int(pattern[:length]))
+            i += 1
+        # Информационные биты лежат сплошными отрезками между степенями двойки:
+        # позиции 3, 5-7, 9-15, ... Отрезок — (сдвиг в данных, маска, сдвиг в кодовом слове)
+        self.segments = []
+        self.data_bits = 0
+        i = 1
+        while 2 ** i < length:
+            size = min(2 ** i - 1, length - 2 ** i)
+            self.segments.append((self.data_bits, (1 << size) - 1, 2 ** i))
+            self.data_bits += size
+            i += 1
+
+    def spread(self, data):
+        """Раскладывает информационные биты по позициям кодового слова (контрольные — нули)"""
+        code = 0
+        for data_shift, mask, code_shift in self.segments:
+            code |= ((data >> data_shift) & mask) << code_shift
+        return code
+
+    def gather(self, code):
+        """Собирает информационные биты из кодового слова"""
+        data = 0
+        for data_shift, mask, code_shift in self.segments:
+            data |= ((code >> code_shift) & mask) << data_shift
+        return data
+
+    def set_parity(self, code):
+        """Записывает контрольные биты: чётность области контроля — popcount по маске
+        (контрольные позиции должны быть нулевыми, как после spread)"""
+        for position, mask in zip(self.parity_positions, self.masks):
+            parity = (code & mask).bit_count() & 1
+            code = (code & ~(1 << (position - 1))) | (parity << (position - 1))
+        return code
+
+    def syndrome(self, code):
+        """Синдром — номер позиции с ошибкой (XOR номеров единичных битов), 0 — ошибки нет"""
+        error_position = 0
+        for position, mask in zip(self.parity_positions, self.masks):
+            error_position |= ((code & mask).bit_count() & 1) * position
+        return error_position
+
+    def correct(self, code):
+        """Исправляет одиночную ошибку; возвращает (кодовое слово, позиция ошибки или 0)"""
+        error_position = self.syndrome(code)
+        if error_position > self.length:
+            raise ValueError(f"Синдром {error_position} указывает за пределы кодового слова")
+        if error_position:  # Синдром — это и есть номер позиции с ошибкой
+            code ^= 1 << (error_position - 1)
+        return code, error_position
+
+    def encode_int(self, data):
+        """Кодирует data_bits информационных битов (младший бит — первый)"""
+        return self.set_parity(self.spread(data))
+
+    def decode_int(self, code):
+        """Декодирует кодовое слово; возвращает (информационные биты, позиция ошибки или 0)"""
+        code, error_position = self.correct(code)
+        return self.gather(code), error_position
+
+    def encode_bytes(self, data):
+        """Кодирует байты (little-endian, младший бит первого байта — первый информационный бит)"""
+        code = self.encode_int(int.from_bytes(data, "little"))
+        return code.to_bytes((self.length + 7) // 8, "little")
+
+    def decode_bytes(self, code):
+        """Декодирует результат encode_bytes; возвращает (байты, позиция ошибки или 0)"""
+        data, error_position = self.decode_int(int.from_bytes(code, "little"))
+        return data.to_bytes((self.data_bits + 7) // 8, "little"), error_position
+
+
+""" Раскладки кодовых слов кэшируются: длина блока обычно одна и та же, и контрольные позиции
+и маски строятся один раз (синдром сам равен номеру позиции с ошибкой, таблица для него
+не нужна). Кодеки после построения не меняются """
+@lru_cache(maxsize=64)
+def hamming_layout(length):
+    return HammingCodec.for_length(length)
+
+
+@lru_cache(maxsize=64)
+def hamming_layout_for_data(data_bits):
+    r = 0                           # Число контрольных битов, как в HammingCodec
+    while 2 ** r <= data_bits + r:
+        r += 1
+    return hamming_layout(data_bits + r)  # Тот же объект, что и для длины кодового слова
+
+
+""" Расширенный код Хэмминга (SECDED): к кодовому слову HammingCodec добавляется бит общей
+чётности. Одиночная ошибка исправляется, двойная обнаруживается. data_bits = 4, 11, 64 дают
+коды (8,4), (16,11), (72,64) """
+class SecdedCodec:
+    def __init__(self, data_bits):
+        self.codec = hamming_layout_for_data(data_bits)
+        self.data_bits = self.codec.data_bits
+        self.length = self.codec.length + 1   # Бит общей чётности — последняя позиция
+        self.code_mask = (1 << self.codec.length) - 1
+
+    def encode_int(self, data):
+        """Кодирует блок: код Хэмминга и бит общей чётности, дополняющий слово до чётного"""
+        code = self.codec.encode_int(data)
+        return code | (code.bit_count() & 1) << self.codec.length
+
+    def decode_int(self, code):
+        """Декодирует блок; возвращает (информационные биты, позиция ошибки или 0).
+        Двойная ошибка (синдром не ноль, общая чётность сошлась) — ValueError"""
+        error_position = self.codec.syndrome(code & self.code_mask)
+        if code.bit_count() & 1:        # Нечётное число ошибок — считаем, что одна
+            if not error_position:      # Ошибка в самом бите общей чётности
+                return self.codec.gather(code), self.length
+            if error_position > self.codec.length:
+                raise ValueError(f"Синдром {error_position} указывает за пределы кодового слова")
+            code ^= 1 << (error_position - 1)
+        elif error_position:
+            raise ValueError("Обнаружена двойная ошибка")
+        return self.codec.gather(code), error_position
+
+    def encode_group(self, data, blocks=8):
+        """Кодирует blocks блоков подряд (биты младшими вперёд)"""
+        code = 0
+        for block in range(blocks):
+            chunk = (data >> (block * self.data_bits)) & ((1 << self.data_bits) - 1)
+            code |= self.encode_int(chunk) << (block * self.length)
+        return code
+
+    def decode_group(self, code, blocks=8):
+        """Декодирует blocks блоков подряд; возвращает (данные, число исправленных ошибок)"""
+        data = 0
+        corrected = 0
+        for block in range(blocks):
+            chunk, error_position = self.decode_int((code >> (block * self.length)) & ((1 << self.length) - 1))
+            data |= chunk << (block * self.data_bits)
+            corrected += bool(error_position)
+        return data, corrected
+
+
+""" Перевод строки битов в число (первый символ — младший бит) и обратно """
+def bits_to_int(data):
+    return int(data[::-1], 2) if data else 0
+
+
+def int_to_bits(value, length):
+    return format(value, f"0{length}b")[::-1] if length else ""
+
+
 """ Функция добавления контрольных битов в данные """
 def insert_parity_bits(data):
-    n = len(data)           # длина данных
-    result = list(data)     # Преобразуем строку данных в список для вставки битов
-    i = 0                   # Инициализируем счётчик для позиций контрольных битов
-    while 2 ** i <= n + i:  # Проверяем, достаточно ли места для нового контрольного бита
-        result.insert(2 ** i - 1, '0')  # Вставляем '0' в позицию 2^i - 1
-        i += 1
-    return ''.join(result)
+    codec = hamming_layout_for_data(len(data))  # Кодек для данной длины данных
+    return int_to_bits(codec.spread(bits_to_int(data)), codec.length)  # Контрольные позиции — '0'
 
 
 """ Функция вычисления значений контрольных битов """
 def calculate_parity_bits(data):
-    data = list(data)   # Преобразуем входную строку в список для изменения
-    n = len(data)       # Получаем длину данных
-    i = 0               # Инициализируем счётчик для контрольных битов
-    while 2 ** i < n:   # Проверяем все позиции контрольных битов (2^i)
-        parity = 0      # Инициализируем значение контрольного бита
-        for j in range(1, n + 1):       # Перебираем позиции битов (нумерация с 1)
-            if j & (2 ** i):            # Проверяем, входит ли бит j в область контроля 2^i
-                parity ^= int(data[j - 1])  # Вычисляем XOR для выбранных битов
-        data[2 ** i - 1] = str(parity)      # Записываем контрольный бит в позицию 2^i - 1
-        i += 1
-    return ''.join(data)
+    codec = hamming_layout(len(data))
+    return int_to_bits(codec.set_parity(bits_to_int(data)), len(data))
 
 """ Функция кодирования данных кодом Хэмминга """
 def encode_hamming(data):
@@ -45,34 +203,138 @@ def introduce_random_error(data):
 
 """ Функция проверки и исправления ошибки """
 def check_and_fix_error(encoded_data):
-    encoded_data = list(encoded_data)  # Преобразуем строку в список для изменения
-    n = len(encoded_data)              # Получаем длину данных
-    error_position = 0                 # Инициализируем позицию ошибки
-    i = 0
-    while 2 ** i < n:       # Проверяем все контрольные биты
-        parity = 0          # Инициализируем значение для пересчёта контрольного бита
-        for j in range(1, n + 1):   # Перебираем позиции битов
-            if j & (2 ** i):        # Проверяем, входит ли бит в область контроля
-                parity ^= int(encoded_data[j - 1])  # Вычисляем XOR
-        if parity:  # Если XOR не равен 0, есть ошибка
-            error_position += 2 ** i  # Добавляем 2^i к позиции ошибки
-        i += 1
+    codec = hamming_layout(len(encoded_data))
+    code, error_position = codec.correct(bits_to_int(encoded_data))  # Синдром = позиция ошибки
     if error_position:  # Если найдена ошибка
-        encoded_data[error_position - 1] = '1' if encoded_data[error_position - 1] == '0' else '0'  # Исправляем бит
         print(f"\nОшибка исправлена в позиции {error_position}")
-    return ''.join(encoded_data)
+    return int_to_bits(code, len(encoded_data))
 
 """ Функция удаления контрольных битов """
 def remove_parity_bits(data):
-    n = len(data)   # Получаем длину данных
-    result = []     # Создаём список для информационных битов
-    i = 0
-    for j in range(n):  # Перебираем все биты
-        if j + 1 != 2 ** i:         # Если позиция не контрольная (не 1, 2, 4, ...)
-            result.append(data[j])  # Добавляем информационный бит
-        else:
-            i += 1
-    return ''.join(result)
+    codec = hamming_layout(len(data))
+    return int_to_bits(codec.gather(bits_to_int(data)), codec.data_bits)
+
+""" Порождающая матрица G (k x n), проверочная матрица H (r x n) и номера информационных
+столбцов для кодового слова длины length; столбец j — позиция j + 1.
+Результат кэшируется вместе с раскладкой, массивы доступны только для чтения """
+@lru_cache(maxsize=16)
+def hamming_matrices(length):
+    import numpy as np
+    codec = hamming_layout(length)
+    positions = np.arange(1, length + 1)
+    data_columns = np.nonzero(positions & (positions - 1))[0]  # Не степени двойки
+    # Строка H — область контроля одного контрольного бита
+    H = np.array([(positions & position) != 0 for position in codec.parity_positions],
+                 dtype=np.uint8).reshape(len(codec.parity_positions), length)
+    # Строка G — кодовое слово для единичного вектора данных: единица на месте информационного
+    # бита и единицы в контрольных позициях, в области контроля которых он лежит
+    G = np.zeros((codec.data_bits, length), dtype=np.uint8)
+    G[np.arange(codec.data_bits), data_columns] = 1
+    G[:, np.array(codec.parity_positions, dtype=np.intp) - 1] = H[:, data_columns].T
+    for matrix in (G, H, data_columns):  # Матрицы общие для всех вызовов — только для чтения
+        matrix.setflags(write=False)
+    return G, H, data_columns
+""" Произведение матриц из 0 и 1 по модулю 2. Умножение идёт в float32 через BLAS:
+суммы точны, пока внутренняя размерность меньше 2^24 """
+def gf2_matmul(a, b):
+    import numpy as np
+    product = a.astype(np.float32) @ b.astype(np.float32)
+    return (product.astype(np.int64) & 1).astype(np.uint8)
+
+""" Пакетное кодирование: data — матрица (N, k) из 0 и 1, результат — (N, n), как encode_hamming """
+def encode_hamming_batch(data):
+    import numpy as np
+    data = np.asarray(data, dtype=np.uint8)
+    G, H, data_columns = hamming_matrices(hamming_layout_for_data(data.shape[1]).length)
+    return gf2_matmul(data, G)
+
+""" Пакетная проверка и исправление: codewords — матрица (N, n).
+Возвращает (исправленные слова, позиции ошибок); 0 — ошибки нет, позиция больше n — ошибку
+исправить нельзя (слово остаётся как есть) """
+def check_and_fix_error_batch(codewords):
+    import numpy as np
+    codewords = np.array(codewords, dtype=np.uint8)  # Копия: исправления не меняют вход
+    length = codewords.shape[1]
+    G, H, data_columns = hamming_matrices(length)
+    syndromes = gf2_matmul(codewords, H.T)
+    # Синдром как число: бит i — нарушенная проверка контрольного бита 2^i
+    error_positions = syndromes.astype(np.int64) @ (1 << np.arange(H.shape[0], dtype=np.int64))
+    rows = np.nonzero((error_positions > 0) & (error_positions <= length))[0]
+    codewords[rows, error_positions[rows] - 1] ^= 1
+    return codewords, error_positions
+
+""" Пакетное удаление контрольных битов: (N, n) -> (N, k), как remove_parity_bits """
+def remove_parity_bits_batch(codewords):
+    import numpy as np
+    codewords = np.asarray(codewords, dtype=np.uint8)
+    G, H, data_columns = hamming_matrices(codewords.shape[1])
+    return codewords[:, data_columns]
+
+""" Потоковое кодирование файла блоками SECDED. source — файловый объект, открытый в двоичном
+режиме; генератор выдаёт закодированные байты. Восемь блоков по data_bits битов — это ровно
+data_bits байт на входе и length байт на выходе, поэтому группы блоков выровнены по байтам.
+В конце данных ставится бит-маркер 1 и нули до целого числа блоков """
+def encode_hamming_stream(source, data_bits=64, chunk_size=65536):
+    codec = SecdedCodec(data_bits)
+    group_in, group_out = codec.data_bits, codec.length  # Байты на группу из восьми блоков
+    buffer = b""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        whole = len(buffer) - len(buffer) % group_in
+        output = bytearray()
+        for start in range(0, whole, group_in):
+            code = codec.encode_group(int.from_bytes(buffer[start:start + group_in], "little"))
+            output += code.to_bytes(group_out, "little")
+        buffer = buffer[whole:]
+        if output:
+            yield bytes(output)
+    # Хвост: меньше group_in байт данных, маркер и дополнение нулями до целого числа блоков
+    tail_bits = len(buffer) * 8 + 1
+    blocks = -(-tail_bits // codec.data_bits)
+    code = codec.encode_group(int.from_bytes(buffer, "little") | 1 << (tail_bits - 1), blocks)
+    yield code.to_bytes((blocks * codec.length + 7) // 8, "little")
+
+""" Потоковое декодирование результата encode_hamming_stream. Одиночные ошибки в блоках
+исправляются, двойная ошибка — ValueError с номером блока. Последняя группа придерживается
+до конца файла, чтобы снять маркер и дополнение """
+def decode_hamming_stream(source, data_bits=64, chunk_size=65536):
+    codec = SecdedCodec(data_bits)
+    group_in, group_out = codec.length, codec.data_bits
+    buffer = b""
+    block_number = 0    # Номер первого блока в буфере (для сообщений об ошибках)
+
+    def decode_group(data, blocks=8):
+        try:
+            return codec.decode_group(int.from_bytes(data, "little"), blocks)[0]
+        except ValueError as error:
+            raise ValueError(f"Блок {block_number} и далее: {error}") from None
+
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # Декодируются только группы, после которых в буфере ещё что-то есть
+        whole = (len(buffer) - 1) // group_in * group_in
+        output = bytearray()
+        for start in range(0, whole, group_in):
+            output += decode_group(buffer[start:start + group_in]).to_bytes(group_out, "little")
+            block_number += 8
+        buffer = buffer[whole:]
+        if output:
+            yield bytes(output)
+    # Последняя группа: данные заканчиваются перед старшим единичным битом (маркером)
+    blocks = len(buffer) * 8 // codec.length
+    data = decode_group(buffer, blocks)
+    if not data:
+        raise ValueError("Не найден маркер конца данных")
+    size = data.bit_length() - 1
+    if size % 8:
+        raise ValueError("Маркер конца данных не на границе байта")
+    yield (data ^ 1 << size).to_bytes(size // 8, "little")
 
 """ Основная функция программы """
 def main():
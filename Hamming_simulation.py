@@ -0,0 +1,107 @@
+import argparse
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Hamming import check_and_fix_error_batch, hamming_layout_for_data, remove_parity_bits_batch
+
+Z_95 = 1.959963984540054  # Квантиль нормального распределения для 95% доверительного интервала
+
+
+def simulate_shard(data_bits, p, trials, seed, batch_size=65536):
+    # Прогон trials кодовых слов через двоичный симметричный канал с вероятностью ошибки p.
+    # Код линейный, а декодер исправляет ошибку независимо от данных, поэтому результат зависит
+    # только от вектора ошибок: передаётся нулевое слово, и ошибки декодирования — это единицы
+    # в декодированных данных.
+    # Возвращает (число слов, ошибочных битов, сумму квадратов ошибок по словам, ошибочных слов).
+    rng = np.random.default_rng(seed)
+    length = hamming_layout_for_data(data_bits).length
+    bit_errors = squared_errors = block_errors = 0
+    done = 0
+    while done < trials:
+        size = min(batch_size, trials - done)
+        received = (rng.random((size, length)) < p).view(np.uint8)
+        fixed = check_and_fix_error_batch(received)[0]
+        errors = remove_parity_bits_batch(fixed).sum(axis=1, dtype=np.int64)  # Ошибочных битов в каждом слове
+        bit_errors += int(errors.sum())
+        squared_errors += int((errors * errors).sum())
+        block_errors += int(np.count_nonzero(errors))
+        done += size
+    return trials, bit_errors, squared_errors, block_errors
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    # Доверительный интервал Уилсона для доли; работает и при нуле наблюдённых событий.
+    if not trials:
+        return 0.0, 1.0
+    share = successes / trials
+    denominator = 1 + z * z / trials
+    center = (share + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(share * (1 - share) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(total, squared, trials, scale, z=Z_95):
+    # Нормальный интервал для среднего числа ошибок на слово, делённого на scale.
+    # Ошибки битов внутри одного слова зависимы (декодер ошибается сразу в нескольких битах),
+    # поэтому дисперсия считается по словам, а не по отдельным битам.
+    # Без единой ошибки дисперсия нулевая и нормальный интервал вырождается в точку. Тогда верхняя
+    # граница — граница Уилсона для доли слов с ошибками: в слове не больше scale ошибок, поэтому
+    # среднее на символ не больше этой доли.
+    if not total:
+        return 0.0, wilson_interval(0, trials, z)[1]
+    mean = total / trials
+    variance = max(squared / trials - mean * mean, 0.0) * trials / max(trials - 1, 1)
+    half = z * math.sqrt(variance / trials)
+    return max(0.0, (mean - half) / scale), min(1.0, (mean + half) / scale)
+
+
+def simulate(data_bits, p, trials, workers=None, seed=0, batch_size=65536, shards=None):
+    # Оценка вероятностей ошибки после декодирования. Испытания делятся на части с независимыми
+    # seed (SeedSequence.spawn) и выполняются в пуле процессов. Число частей зависит только от trials
+    # и batch_size, поэтому при одном seed результат не зависит от числа процессов.
+    shards = shards or max(1, min(-(-trials // batch_size), 64))
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    sizes = [trials // shards + (number < trials % shards) for number in range(shards)]
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(simulate_shard, [data_bits] * shards, [p] * shards, sizes, seeds,
+                              [batch_size] * shards))
+    total, bit_errors, squared_errors, block_errors = (sum(column) for column in zip(*parts))
+    return {
+        "data_bits": data_bits,
+        "length": hamming_layout_for_data(data_bits).length,
+        "p": p,
+        "trials": total,
+        "bit_errors": bit_errors,
+        "block_errors": block_errors,
+        "ber": bit_errors / (total * data_bits) if total else 0.0,
+        "ber_interval": mean_interval(bit_errors, squared_errors, total, data_bits),
+        "bler": block_errors / total if total else 0.0,
+        "bler_interval": wilson_interval(block_errors, total),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Оценка вероятности ошибки кода Хэмминга в двоичном симметричном канале")
+    parser.add_argument("--data-bits", type=int, default=64, help="число информационных битов в слове")
+    parser.add_argument("--p", type=float, nargs="+", default=[1e-2, 1e-3], help="вероятности ошибки в канале")
+    parser.add_argument("--trials", type=int, default=1_000_000, help="число передаваемых слов")
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию — все ядра)")
+    parser.add_argument("--seed", type=int, default=0, help="seed генератора")
+    parser.add_argument("--batch-size", type=int, default=65536, help="слов в одной векторной пачке")
+    args = parser.parse_args()
+
+    print(f"{'p':>10} {'BER':>12} {'95% ДИ':>27} {'BLER':>12} {'95% ДИ':>27}")
+    for p in args.p:
+        result = simulate(args.data_bits, p, args.trials, args.workers, args.seed, args.batch_size)
+        ber_low, ber_high = result["ber_interval"]
+        bler_low, bler_high = result["bler_interval"]
+        print(f"{p:>10.3g} {result['ber']:>12.4e} [{ber_low:>11.4e}, {ber_high:>11.4e}] "
+              f"{result['bler']:>12.4e} [{bler_low:>11.4e}, {bler_high:>11.4e}]")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
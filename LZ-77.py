@@ -1,7 +1,527 @@
+import io
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+class BitWriter:
+    # Запись битов (старшими вперёд) в bytearray через целочисленный накопитель:
+    # в буфер сбрасываются сразу целые байты, а не отдельные биты.
+    def __init__(self):
+        self.buffer = bytearray()
+        self.acc = 0  # Накопитель ещё не сброшенных битов.
+        self.nbits = 0  # Количество битов в накопителе.
+
+    def write(self, value, nbits):
+        # Дописывает младшие nbits битов числа value.
+        self.acc = (self.acc << nbits) | value
+        self.nbits += nbits
+        if self.nbits >= 64:
+            extra = self.nbits % 8  # Биты, не составляющие целый байт, остаются в накопителе.
+            self.buffer += (self.acc >> extra).to_bytes(self.nbits // 8, "big")
+            self.acc &= (1 << extra) - 1
+            self.nbits = extra
+
+    def getvalue(self):
+        # Возвращает записанные данные, дополняя последний байт нулями.
+        pad = -self.nbits % 8
+        return bytes(self.buffer) + (self.acc << pad).to_bytes((self.nbits + pad) // 8, "big")
+
+
+class BitReader:
+    # Чтение битов (старшими вперёд) из bytes/bytearray, начиная с байта pos.
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos  # Следующий непрочитанный байт.
+        self.acc = 0  # Прочитанные, но ещё не выданные биты.
+        self.nbits = 0
+
+    def read(self, nbits):
+        # Читает nbits битов и возвращает их как число.
+        while self.nbits < nbits:
+            chunk = self.data[self.pos:self.pos + 8]
+            if not chunk:
+                raise ValueError("Неожиданный конец сжатых данных")
+            self.acc = (self.acc << 8 * len(chunk)) | int.from_bytes(chunk, "big")
+            self.nbits += 8 * len(chunk)
+            self.pos += len(chunk)
+        self.nbits -= nbits
+        value = self.acc >> self.nbits
+        self.acc &= (1 << self.nbits) - 1
+        return value
+
+    def at_padding(self):
+        # Данные кончились, а оставшиеся биты — нули дополнения последнего байта
+        # (одиночный символ занимает 9 бит, а совпадение начинается с единицы).
+        return self.pos >= len(self.data) and self.nbits < 8 and self.acc == 0
+
+    def read_unary(self):
+        # Читает унарный код: количество единиц до первого нуля.
+        count = 0
+        while self.read(1):
+            count += 1
+        return count
+
+
+def as_array(data):
+    # Массив NumPy над входными данными: для байтов — uint8 без копирования,
+    # для строки — uint32 с кодом каждого символа.
+    import numpy as np
+    if isinstance(data, str):
+        return np.frombuffer(data.encode("utf-32-le"), dtype=np.uint32)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def match_lengths(array, pos, candidates, limits, chunk=8):
+    # Векторное ядро сравнения: для всех позиций-кандидатов сразу считает длину общего префикса
+    # array[кандидат:] и array[pos:], но не больше limits[j] для j-го кандидата.
+    # Сравнение идёт кусками (chunk символов, затем вдвое больше): первое несовпадение в куске
+    # находит argmax, кандидаты с найденным несовпадением из дальнейшего сравнения выбывают.
+    import numpy as np
+    candidates = np.asarray(candidates, dtype=np.int64)
+    limits = np.asarray(limits, dtype=np.int64)
+    lengths = limits.copy()  # Кандидаты без несовпадения в пределах limits совпадают целиком.
+    active = np.arange(len(candidates))  # Номера кандидатов, для которых длина ещё не найдена.
+    last = len(array) - 1
+    offset = 0
+    max_limit = int(limits.max()) if len(limits) else 0
+    while active.size and offset < max_limit:
+        steps = np.arange(offset, offset + chunk)
+        # Индексы за концом данных обрезаются: такие символы всё равно дальше limits.
+        target = array[np.minimum(pos + steps, last)]
+        source = array[np.minimum(candidates[active, None] + steps, last)]
+        mismatch = (source != target) | (steps >= limits[active, None])
+        found = mismatch.any(axis=1)
+        lengths[active[found]] = np.minimum(offset + mismatch[found].argmax(axis=1), limits[active[found]])
+        active = active[~found]
+        offset += chunk
+        chunk *= 2
+    return lengths
+
+
+def best_candidate(array, pos, candidates, limits):
+    # Самое длинное совпадение среди кандидатов (упорядоченных от ближних к дальним) через
+    # match_lengths; при равной длине argmax берёт первого, то есть самого близкого.
+    # Возвращает (позиция, длина) или (-1, 0).
+    if not len(candidates):
+        return -1, 0
+    lengths = match_lengths(array, pos, candidates, limits)
+    best = int(lengths.argmax())
+    if lengths[best] == 0:
+        return -1, 0
+    return int(candidates[best]), int(lengths[best])
+
+
+class ScanMatcher:
+    # Эталонный поиск совпадений: полный перебор окна методом LZ77.find_longest_match
+    # (или, при vectorized=True, тот же перебор ядром match_lengths).
+    def __init__(self, lz, data):
+        self.lz = lz  # Кодировщик (нужен размер окна и сам метод перебора).
+        self.data = data  # Весь входной текст.
+        # bytearray потокового кодировщика меняет размер, поэтому массив над ним строится заново при каждом поиске.
+        self.array = as_array(data) if lz.vectorized and not isinstance(data, bytearray) else None
+
+    def find(self, pos):
+        # Окно поиска — последние window_size символов перед pos.
+        # Совпадение не может быть длиннее окна, поэтому буфер предпросмотра ограничен тем же размером.
+        window_size = self.lz.window_size
+        if self.lz.vectorized:
+            import numpy as np
+            array = self.array if self.array is not None else as_array(self.data)
+            candidates = np.arange(pos - 1, max(0, pos - window_size) - 1, -1)
+            limits = np.minimum(pos - candidates, len(self.data) - pos)
+            best_pos, length = best_candidate(array, pos, candidates, limits)
+            return (pos - best_pos - 1, length) if length else (0, 0)
+        search_window = self.data[max(0, pos - window_size):pos]
+        lookahead_buffer = self.data[pos:pos + window_size]
+        return self.lz.find_longest_match(search_window, lookahead_buffer)
+
+    @property
+    def lookahead(self):
+        # Сколько символов после pos нужно find (используется потоковым кодировщиком).
+        return self.lz.window_size
+
+    def rebase(self, drop):
+        # Из начала данных удалены drop символов; позиций перебор окна не хранит.
+        pass
+
+
+class HashChainMatcher:
+    # Поиск совпадений по хеш-цепочкам (как в zlib): позиции с одинаковыми тремя следующими
+    # символами связаны в цепочку от ближней к дальней, поэтому проверяются только кандидаты,
+    # у которых уже совпадает начало. Совпадения короче трёх символов ищутся по таблицам
+    # последних вхождений одиночных символов и пар символов.
+    MIN_MATCH = 3
+
+    def __init__(self, lz, data):
+        self.data = data
+        self.text = isinstance(data, str)  # Для байтов ключи таблиц — числа (срезы bytearray нехешируемы).
+        self.window_size = lz.window_size
+        self.lookahead = self.window_size  # Совпадение не длиннее окна.
+        self.chain_depth = lz.chain_depth  # Сколько кандидатов из цепочки проверять не больше.
+        self.nice_length = lz.nice_length  # Совпадение такой длины уже достаточно хорошее: дальше не ищем.
+        self.vectorized = lz.vectorized  # Сравнивать кандидатов ядром match_lengths.
+        self.array = as_array(data) if self.vectorized and not isinstance(data, bytearray) else None
+        self.head = {}  # Ключ (три символа) -> последняя позиция с таким началом.
+        # Кольцевой массив ссылок: prev[i % window_size] — предыдущая позиция с тем же ключом, что у i.
+        # Позиции старше окна не нужны, поэтому памяти хватает на window_size элементов.
+        self.prev = [-1] * self.window_size
+        self.last1 = {}  # Символ -> последняя позиция.
+        self.last2 = {}  # Пара символов -> последняя позиция.
+        self.indexed = 0  # Таблицы описывают префикс data[:indexed].
+
+    def key(self, i, size):
+        # Ключ таблицы для size символов, начиная с позиции i.
+        if self.text:
+            return self.data[i:i + size]
+        return int.from_bytes(self.data[i:i + size], "big")
+
+    def rebase(self, drop):
+        # Из начала данных удалены drop символов (потоковое кодирование): сдвигаем все
+        # сохранённые позиции. Позиции, ушедшие из данных, уже вне окна и просто забываются.
+        self.head = {key: i - drop for key, i in self.head.items() if i >= drop}
+        self.last1 = {key: i - drop for key, i in self.last1.items() if i >= drop}
+        self.last2 = {key: i - drop for key, i in self.last2.items() if i >= drop}
+        # Ячейка кольцевого массива для новой позиции j — бывшая ячейка позиции j + drop.
+        shift = drop % self.window_size
+        prev = self.prev[shift:] + self.prev[:shift]
+        self.prev = [i - drop if i >= drop else -1 for i in prev]
+        self.indexed -= drop
+
+    def _index_up_to(self, pos):
+        # Добавляем в таблицы позиции, совпадения с которых целиком лежат в data[:pos].
+        data = self.data
+        for end in range(self.indexed + 1, pos + 1):
+            self.last1[data[end - 1]] = end - 1
+            if end >= 2:
+                self.last2[self.key(end - 2, 2)] = end - 2
+            if end >= self.MIN_MATCH:
+                i = end - self.MIN_MATCH
+                key = self.key(i, self.MIN_MATCH)
+                self.prev[i % self.window_size] = self.head.get(key, -1)
+                self.head[key] = i
+        self.indexed = max(self.indexed, pos)
+
+    def find(self, pos):
+        # Возвращает (смещение, длина) самого длинного совпадения для позиции pos —
+        # то же, что find_longest_match для окна data[pos - window_size:pos].
+        self._index_up_to(pos)
+        data = self.data
+        limit = max(0, pos - self.window_size)  # Самая дальняя позиция внутри окна.
+        remaining = len(data) - pos  # Длина оставшегося (ещё не закодированного) текста.
+        best_pos = -1
+        max_length = 0
+
+        if remaining >= self.MIN_MATCH and self.vectorized:
+            # Собираем кандидатов из цепочки и сравниваем их все сразу.
+            candidates = []
+            i = self.head.get(self.key(pos, self.MIN_MATCH), -1)
+            while i >= limit and len(candidates) < self.chain_depth:
+                candidates.append(i)
+                i = self.prev[i % self.window_size]
+            limits = [min(pos - i, remaining) for i in candidates]
+            array = self.array if self.array is not None else as_array(data)
+            best_pos, max_length = best_candidate(array, pos, candidates, limits)
+        elif remaining >= self.MIN_MATCH:
+            i = self.head.get(self.key(pos, self.MIN_MATCH), -1)
+            depth = self.chain_depth
+            # Идём по цепочке от ближних позиций к дальним, пока не выйдем за окно.
+            while i >= limit and depth > 0:
+                # Совпадение не выходит за окно (i + длина <= pos) и за конец текста.
+                max_possible = min(pos - i, remaining)
+                # Длиннее лучшего кандидат может быть, только если совпадает символ сразу за лучшей
+                # длиной (как scan_end в zlib) и весь префикс этой длины — он сравнивается одним срезом.
+                if max_length and (max_length >= max_possible or data[i + max_length] != data[pos + max_length]
+                                   or data[i:i + max_length] != data[pos:pos + max_length]):
+                    i = self.prev[i % self.window_size]
+                    depth -= 1
+                    continue
+                # Первые три символа совпадают по построению цепочки, а max_length + 1 — по проверке выше.
+                length = max(max_length + 1, self.MIN_MATCH)
+                while length < max_possible and data[i + length] == data[pos + length]:
+                    length += 1
+                # Строгое сравнение: при равной длине остаётся более близкая позиция.
+                if length > max_length:
+                    max_length = length
+                    best_pos = i
+                    if max_length == remaining or max_length >= self.nice_length:
+                        break
+                i = self.prev[i % self.window_size]
+                depth -= 1
+
+        # Совпадений из трёх и более символов нет — ищем пару, затем одиночный символ.
+        if max_length == 0 and remaining >= 2:
+            i = self.last2.get(self.key(pos, 2), -1)
+            if i >= limit:
+                max_length, best_pos = 2, i
+        if max_length == 0 and remaining >= 1:
+            i = self.last1.get(data[pos], -1)
+            if i >= limit:
+                max_length, best_pos = 1, i
+
+        if max_length == 0:
+            return 0, 0
+        # Смещение, как и в find_longest_match, — расстояние от конца окна.
+        return pos - best_pos - 1, max_length
+
+
+def suffix_array(text):
+    # Суффиксный массив удвоением префиксов: на шаге k суффиксы упорядочены по первым 2k символам.
+    # Время O(n log² n) не зависит от содержимого текста (в отличие от сортировки срезов на
+    # длинных сериях одного символа).
+    n = len(text)
+    alphabet = {c: r for r, c in enumerate(sorted(set(text)))}
+    rank = [alphabet[c] for c in text]  # Ранг суффикса по уже упорядоченному префиксу.
+    sa = list(range(n))
+    k = 1
+    while n > 1:
+        # Ключ суффикса i — пара (ранг i, ранг i + k), упакованная в одно число.
+        keys = [rank[i] * (n + 1) + (rank[i + k] + 1 if i + k < n else 0) for i in range(n)]
+        sa.sort(key=keys.__getitem__)
+        new_rank = [0] * n
+        for j in range(1, n):
+            new_rank[sa[j]] = new_rank[sa[j - 1]] + (keys[sa[j]] != keys[sa[j - 1]])
+        rank = new_rank
+        if rank[sa[-1]] == n - 1:  # Все ранги различны — порядок окончательный.
+            break
+        k *= 2
+    return sa, rank
+
+
+def lcp_array(text, sa, rank):
+    # Алгоритм Касаи: lcp[r] — длина общего префикса суффиксов sa[r - 1] и sa[r], время O(n).
+    n = len(text)
+    lcp = [0] * n
+    h = 0
+    for i in range(n):
+        if rank[i] > 0:
+            j = sa[rank[i] - 1]
+            while i + h < n and j + h < n and text[i + h] == text[j + h]:
+                h += 1
+            lcp[rank[i]] = h
+            if h > 0:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+class SuffixArrayMatcher:
+    # Поиск совпадений по суффиксному массиву. Вход делится на блоки; для блока строится
+    # суффиксный массив текста «окно + блок + предпросмотр». Кандидаты для позиции pos — соседи
+    # её суффикса в массиве: общий префикс с ними убывает по мере удаления, поэтому просмотр
+    # останавливается, как только он становится короче найденного совпадения. Время не
+    # деградирует на вырожденных входах (длинные серии одного символа), где цепочки и перебор
+    # окна становятся квадратичными. Результат тот же, что у find_longest_match.
+    def __init__(self, lz, data):
+        self.data = data
+        self.window_size = lz.window_size
+        self.block_size = max(self.window_size, 1024)  # Сколько позиций обслуживает один массив.
+        self.block_start = self.block_end = self.base = 0  # Текущий блок позиций [block_start, block_end).
+        self.lookahead = self.block_size + self.window_size  # Блок и предпросмотр после него.
+
+    def rebase(self, drop):
+        # Из начала данных удалены drop символов: массивы блока хранят копию текста,
+        # поэтому сдвигаются только границы.
+        self.base -= drop
+        self.block_start -= drop
+        self.block_end -= drop
+
+    def _build(self, pos):
+        # Строим массивы для блока, начинающегося с pos.
+        self.block_start = pos
+        self.block_end = min(len(self.data), pos + self.block_size)
+        self.base = max(0, pos - self.window_size)  # Начало текста блока во входных данных.
+        # Совпадение не длиннее окна, поэтому после блока достаточно window_size символов.
+        self.text = self.data[self.base:min(len(self.data), self.block_end + self.window_size)]
+        self.sa, self.rank = suffix_array(self.text)
+        self.lcp = lcp_array(self.text, self.sa, self.rank)
+
+    def find(self, pos):
+        if not self.block_start <= pos < self.block_end:
+            self._build(pos)
+        sa, lcp = self.sa, self.lcp
+        local = pos - self.base  # Позиция pos внутри текста блока.
+        limit = max(0, local - self.window_size)  # Самая дальняя позиция окна.
+        r = self.rank[local]
+        best_pos = -1
+        max_length = 0
+
+        # Просматриваем соседей вверх (step=-1) и вниз (step=+1) по суффиксному массиву.
+        for step in (-1, 1):
+            common = len(self.text)  # Общий префикс с текущим соседом (минимум lcp на пути).
+            k = r
+            while (k > 0) if step < 0 else (k < len(sa) - 1):
+                common = min(common, lcp[k] if step < 0 else lcp[k + 1])
+                # Дальше общий префикс только короче — лучшего (или равного) совпадения не будет.
+                if common == 0 or common < max_length:
+                    break
+                k += step
+                i = sa[k]
+                if limit <= i < local:
+                    # Совпадение не выходит за окно: i + длина <= pos.
+                    length = min(common, local - i)
+                    # При равной длине выбираем более близкую позицию, как find_longest_match.
+                    if length > max_length or (length == max_length and i > best_pos):
+                        max_length = length
+                        best_pos = i
+
+        if max_length == 0:
+            return 0, 0
+        return local - best_pos - 1, max_length
+
+
+# Заголовок упакованного потока: размер окна и длина исходных данных.
+HEADER = struct.Struct(">IQ")
+UNKNOWN_LENGTH = 2 ** 64 - 1  # Длина в заголовке потокового кодирования: до конца данных.
+FILE_FLUSH_SIZE = 1 << 20  # encode_file сбрасывает упакованные байты в выходной файл такими порциями.
+
+
+def read_chunks(source, chunk_size):
+    # Блоки bytes из двоичного файлового объекта (метод read) или из итератора блоков.
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+def copy_match(output, pos, distance, length):
+    # Копирует в output[pos:pos + length] символы, стоящие на distance позиций раньше.
+    # output — bytearray или список символов заранее нужной длины.
+    start = pos - distance
+    if length <= distance:
+        # Источник и приёмник не пересекаются — одно копирование срезом.
+        output[pos:pos + length] = output[start:start + length]
+        return
+    # Совпадение перекрывает само себя (distance < length): результат периодичен с периодом
+    # distance, поэтому копируем один период, а дальше удваиваем уже скопированный кусок —
+    # его длина всегда кратна периоду.
+    output[pos:pos + distance] = output[start:pos]
+    copied = distance
+    while copied < length:
+        n = min(copied, length - copied)
+        output[pos + copied:pos + copied + n] = output[pos:pos + n]
+        copied += n
+
+
+def read_tokens(reader, output, pos, end, window_size, origin=0):
+    # Декодирует шаги кодирования из reader в bytearray output, начиная с позиции pos,
+    # пока не дойдёт до end; возвращает позицию, на которой остановился.
+    # origin — начало блока вместе со словарём: от него, как и при кодировании, считается
+    # разрядность смещения, и раньше него совпадения не ссылаются.
+    # Если длина неизвестна (UNKNOWN_LENGTH), output по мере надобности удлиняется.
+    while pos < end:
+        # Длина неизвестна (encode_stream): поток кончается нулями дополнения последнего байта.
+        if end == UNKNOWN_LENGTH and reader.at_padding():
+            break
+        # Флаг 0 — одиночный символ (8 бит).
+        if reader.read(1) == 0:
+            if pos >= len(output):
+                output.extend(bytes(len(output) + 1))
+            output[pos] = reader.read(8)
+            pos += 1
+            continue
+        real_window = max(1, min(pos - origin, window_size))
+        offset = reader.read(real_window.bit_length())
+        k = reader.read_unary()
+        length = (1 << k) | reader.read(k)
+        if pos - offset - 1 < origin or pos + length > end:
+            raise ValueError("Повреждённые сжатые данные")
+        if pos + length > len(output):
+            output.extend(bytes(max(len(output), length)))
+        copy_match(output, pos, offset + 1, length)
+        pos += length
+    return pos
+
+
+# Контейнер блочного сжатия: сигнатура, размер окна, размер блока, есть ли словари,
+# число блоков; затем для каждого блока — исходный и сжатый размер.
+BLOCK_MAGIC = b"LZ7B"
+BLOCK_HEADER = struct.Struct(">4sII?I")
+BLOCK_ENTRY = struct.Struct(">II")
+
+
+def read_block_index(container):
+    # Разбирает заголовок контейнера compress_blocks.
+    # Возвращает (размер окна, есть ли словари, [(исходный размер, начало, сжатый размер), ...]).
+    magic, window_size, _, primed, count = BLOCK_HEADER.unpack_from(container)
+    if magic != BLOCK_MAGIC:
+        raise ValueError("Это не контейнер блочного сжатия LZ77")
+    offset = BLOCK_HEADER.size + count * BLOCK_ENTRY.size  # Начало первого сжатого блока.
+    blocks = []
+    for i in range(count):
+        raw_len, packed_len = BLOCK_ENTRY.unpack_from(container, BLOCK_HEADER.size + i * BLOCK_ENTRY.size)
+        blocks.append((raw_len, offset, packed_len))
+        offset += packed_len
+    return window_size, primed, blocks
+
+
+# Доступные способы поиска совпадений (аргумент match_finder у LZ77).
+MATCH_FINDERS = {
+    "scan": ScanMatcher,
+    "hash": HashChainMatcher,
+    "suffix": SuffixArrayMatcher,
+}
+
+
+# Уровни сжатия (аргумент level у LZ77), как у zlib: уровень -> (глубина хеш-цепочки,
+# достаточная длина совпадения, разбор). Найдя совпадение достаточной длины, хеш-цепочка
+# дальше не проверяется, а оптимальный разбор не ищет совпадения внутри него заново.
+# "greedy" — сразу берётся самое длинное совпадение; "lazy" — совпадение откладывается на один
+# символ, если со следующей позиции найдено более длинное и это дешевле в битах; "optimal" — среди всех разбиений
+# блока выбирается то, что занимает меньше всего бит.
+LEVELS = {
+    1: (4, 8, "greedy"),
+    2: (8, 16, "greedy"),
+    3: (32, 258, "greedy"),
+    4: (16, 16, "lazy"),
+    5: (32, 32, "lazy"),
+    6: (128, 128, "lazy"),
+    7: (256, 64, "optimal"),
+    8: (1024, 128, "optimal"),
+    9: (4096, 258, "optimal"),
+}
+OPTIMAL_BLOCK = 4096  # Сколько позиций разбирается оптимально за один раз.
+OPTIMAL_LENGTHS = 32  # Кроме самого длинного совпадения, пробуются все длины до этой.
+
+
 class LZ77:
-    def __init__(self, window_size=64):
+    def __init__(self, window_size=64, match_finder="hash", chain_depth=None, level=None, vectorized=False,
+                 nice_length=None):
         # Размер окна поиска (search window) — сколько символов назад мы можем искать совпадения.
         self.window_size = window_size
+        # Способ поиска совпадений: "hash" — хеш-цепочки (по умолчанию), "suffix" — суффиксный
+        # массив (устойчив к вырожденным входам), "scan" — полный перебор окна (эталон).
+        if match_finder not in MATCH_FINDERS:
+            raise ValueError(f"Неизвестный способ поиска совпадений: {match_finder}")
+        self.match_finder = match_finder
+        # Уровень сжатия 1–9 задаёт способ разбора и глубину хеш-цепочки (см. LEVELS).
+        # По умолчанию 6; эталонный "scan" по умолчанию разбирает жадно (уровень 3), как исходный
+        # алгоритм, — для совпадения с эталонным разбором другие уровни задаются только явно.
+        if level is None:
+            level = 3 if match_finder == "scan" else 6
+        if level not in LEVELS:
+            raise ValueError(f"Уровень сжатия должен быть от 1 до 9, а не {level}")
+        self.level = level
+        level_depth, level_nice, self.parsing = LEVELS[level]
+        # Глубина хеш-цепочки: сколько кандидатов проверяется на одну позицию в режиме "hash".
+        self.chain_depth = level_depth if chain_depth is None else chain_depth
+        # Достаточная длина совпадения (как nice_length в zlib); совпадение не длиннее окна.
+        self.nice_length = min(level_nice if nice_length is None else nice_length, window_size)
+        # На сколько позиций вперёд заглядывает разбор при выборе очередных шагов.
+        self.parse_ahead = {"greedy": 0, "lazy": 1, "optimal": OPTIMAL_BLOCK}[self.parsing]
+        # Сравнивать кандидатов векторным ядром match_lengths (нужен NumPy). Суффиксному массиву
+        # оно не нужно: длины совпадений он берёт из массива LCP.
+        self.vectorized = vectorized
 
     def find_longest_match(self, search_window, lookahead_buffer):
         # Метод ищет самую длинную подстроку в окне поиска, совпадающую с началом буфера предпросмотра.
@@ -27,52 +547,381 @@ class LZ77:
         # Возвращаем смещение и длину лучшего совпадения.
         return best_offset, max_length
 
+    def parse(self, data, start=0):
+        # Разбор входа на шаги кодирования: генератор троек (позиция, смещение, длина).
+        # Длина 0 означает одиночный символ data[позиция]. Символы до start не кодируются,
+        # а только заполняют окно поиска (словарь).
+        matcher = MATCH_FINDERS[self.match_finder](self, data)  # Поиск совпадений.
+        pos = start  # Текущая позиция: слева — окно поиска, справа — буфер предпросмотра.
+        while pos < len(data):
+            for pos, offset, length in self.next_tokens(matcher, pos, len(data)):
+                yield pos, offset, length
+            pos += max(length, 1)
+
+    def next_tokens(self, matcher, pos, end):
+        # Очередные шаги кодирования начиная с позиции pos (данные известны до end)
+        # в соответствии со способом разбора уровня сжатия.
+        # Ищем самое длинное совпадение в окне поиска (последние window_size символов перед pos).
+        if self.parsing == "greedy":
+            return [(pos,) + matcher.find(pos)]
+        if self.parsing == "lazy":
+            offset, length = matcher.find(pos)
+            if length > 0 and pos + 1 < end:
+                # Со следующей позиции совпадение длиннее — записываем символ и берём его,
+                # если так отрезок [pos, pos + 1 + next_length) кодируется меньшим числом бит.
+                # Без отсрочки тот же отрезок покрывают текущее совпадение и хвост следующего
+                # (хвост совпадения — тоже совпадение с тем же смещением) или одиночный символ.
+                next_offset, next_length = matcher.find(pos + 1)
+                if next_length > length:
+                    deferred_bits = self.token_bits(pos, 0) + self.token_bits(pos + 1, next_length)
+                    rest = next_length + 1 - length
+                    greedy_bits = self.token_bits(pos, length) + min(
+                        self.token_bits(pos + length, rest),
+                        self.token_bits(pos + length, 0) if rest == 1 else float("inf"))
+                    if deferred_bits < greedy_bits:
+                        return [(pos, 0, 0), (pos + 1, next_offset, next_length)]
+            return [(pos, offset, length)]
+        return self.optimal_tokens(matcher, pos, min(end, pos + OPTIMAL_BLOCK))
+
+    def optimal_tokens(self, matcher, start, end):
+        # Оптимальный разбор позиций [start, end): динамическое программирование с конца блока,
+        # cost[i] — наименьшее число бит, которыми можно закодировать data[i:end].
+        # Любое начало совпадения — тоже совпадение с тем же смещением, а число бит зависит
+        # только от позиции и длины, поэтому достаточно самого длинного совпадения в каждой позиции.
+        # Внутри совпадения достаточной длины (nice_length) поиск не повторяется: в следующей
+        # позиции берётся то же совпадение, укороченное на один символ.
+        matches = []
+        offset = length = skip = 0
+        for pos in range(start, end):
+            if skip:
+                skip -= 1
+                length -= 1
+            else:
+                offset, length = matcher.find(pos)
+                skip = length - 1 if length >= self.nice_length else 0
+            matches.append((offset, length))
+        size = end - start
+        cost = [0] * (size + 1)
+        choice = [0] * size  # Выбранная длина шага в позиции (0 — одиночный символ).
+        for i in range(size - 1, -1, -1):
+            pos = start + i
+            best = self.token_bits(pos, 0) + cost[i + 1]
+            best_length = 0
+            longest = matches[i][1]
+            lengths = list(range(1, min(longest, OPTIMAL_LENGTHS) + 1))
+            if longest > OPTIMAL_LENGTHS:
+                lengths.append(longest)
+            for length in lengths:
+                # Шаг может выйти за конец блока: следующий блок начнётся после него.
+                bits = self.token_bits(pos, length) + cost[min(i + length, size)]
+                if bits < best:
+                    best, best_length = bits, length
+            cost[i] = best
+            choice[i] = best_length
+
+        tokens = []
+        i = 0
+        while i < size:
+            length = choice[i]
+            tokens.append((start + i, matches[i][0] if length else 0, length))
+            i += max(length, 1)
+        return tokens
+
+    def token_bits(self, pos, length):
+        # Число бит шага кодирования в позиции pos — так же, как в таблице print_encoded_data:
+        # одиночный символ — 1 + 8, совпадение — 1 + биты смещения + код длины.
+        if length == 0:
+            return 1 + 8
+        real_window = max(1, min(pos, self.window_size))
+        return 1 + real_window.bit_length() + 2 * (length.bit_length() - 1) + 1
+
+    def count_bits(self, encoded_data):
+        # Общее число бит результата encode (итог таблицы print_encoded_data).
+        total_bits = 0
+        pos = 0
+        for sequence, flag, distance, length, code in encoded_data:
+            total_bits += self.token_bits(pos, length if flag else 0)
+            pos += length if flag else 1
+        return total_bits
+
+    def level_report(self, data, levels=tuple(LEVELS)):
+        # Скорость кодирования и число бит на символ для каждого уровня сжатия
+        # (окно и способ поиска совпадений — как у этого кодировщика).
+        report = []
+        for level in levels:
+            lz = LZ77(self.window_size, self.match_finder, level=level, vectorized=self.vectorized)
+            started = time.perf_counter()
+            encoded = lz.encode(data)
+            seconds = time.perf_counter() - started
+            bits = lz.count_bits(encoded)
+            report.append({
+                "level": level,
+                "parsing": lz.parsing,
+                "seconds": seconds,
+                "symbols_per_second": len(data) / seconds if seconds else float("inf"),
+                "bits": bits,
+                "bits_per_symbol": bits / len(data) if data else 0.0,
+            })
+        return report
+
     def encode(self, input_string):
         # Метод кодирует входную строку, заменяя повторяющиеся подстроки на ссылки (смещение, длина).
         encoded_data = []  # Список для хранения закодированных данных.
-        search_window = ""  # Окно поиска — уже обработанный текст.
-        lookahead_buffer = input_string  # Буфер предпросмотра — ещё не обработанный текст.
-        pos = 0  # Текущая позиция в строке.
 
         # Обрабатываем строку, пока не закодируем все символы.
-        while pos < len(input_string):
-            # Если окно поиска превышает заданный размер, обрезаем до последних window_size символов.
-            if len(search_window) > self.window_size:
-                search_window = search_window[-self.window_size:]
-
-            # Берём первый символ буфера предпросмотра.
-            current_char = lookahead_buffer[0]
-            # Ищем самое длинное совпадение в окне поиска.
-            offset, length = self.find_longest_match(search_window, lookahead_buffer)
-
-            # Если совпадений нет (length == 0), кодируем одиночный символ.
-            if length == 0:
-                # Добавляем кортеж: (символ, флаг=0, смещение=0, длина=0, строковый код).
-                encoded_data.append((current_char, 0, 0, 0, f"0bin({current_char})"))
-                # Добавляем символ в окно поиска.
-                search_window += current_char
-                # Удаляем первый символ из буфера предпросмотра.
-                lookahead_buffer = lookahead_buffer[1:]
+        for pos, offset, length in self.parse(input_string):
+            encoded_data.append(self.make_token(input_string, pos, offset, length))
+        # Возвращаем список закодированных данных.
+        return encoded_data
+
+    def make_token(self, data, pos, offset, length):
+        # Кортеж одного шага кодирования для позиции pos.
+        # Если совпадений нет (length == 0), кодируем одиночный символ.
+        if length == 0:
+            current_char = data[pos:pos + 1]
+            if not isinstance(data, (str, bytes)):
+                current_char = bytes(current_char)  # Копия, не зависящая от буфера (bytearray, memoryview).
+            # Кортеж: (символ, флаг=0, смещение=0, длина=0, строковый код).
+            return current_char, 0, 0, 0, f"0bin({current_char})"
+        # Если совпадение найдено, кодируем подстроку длиной length из буфера предпросмотра.
+        matched_sequence = data[pos:pos + length]
+        if not isinstance(data, (str, bytes)):
+            matched_sequence = bytes(matched_sequence)
+        # Кортеж: (подстрока, флаг=1, смещение, длина, строковый код).
+        return (
+            matched_sequence,
+            1,
+            offset,
+            length,
+            f"1 {offset} {length}"
+        )
+
+    def encode_stream(self, source, chunk_size=65536, packed=False):
+        # Потоковое кодирование: source — двоичный файловый объект или итератор блоков bytes.
+        # Генератор выдаёт кортежи шагов (как encode) или, при packed=True, куски упакованного
+        # потока (формат encode_to_bytes; длина в заголовке неизвестна, поэтому UNKNOWN_LENGTH).
+        # В памяти держатся только окно, буфер предпросмотра и один прочитанный блок.
+        chunks = read_chunks(source, chunk_size)
+        buffer = bytearray()  # Окно поиска + буфер предпросмотра; buffer[0] — позиция base.
+        matcher = MATCH_FINDERS[self.match_finder](self, buffer)
+        base = 0  # Позиция начала буфера во всём потоке.
+        pos = 0  # Текущая позиция внутри буфера.
+        eof = False
+        writer = BitWriter()
+        if packed:
+            yield HEADER.pack(self.window_size, UNKNOWN_LENGTH)
+
+        while True:
+            # Дочитываем вход, пока буфер предпросмотра не станет полным.
+            while not eof and len(buffer) - pos < matcher.lookahead + self.parse_ahead + 1:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    eof = True
+                else:
+                    buffer += chunk
+            if pos >= len(buffer):
+                break
+
+            for pos, offset, length in self.next_tokens(matcher, pos, len(buffer)):
+                if packed:
+                    # Разрядность смещения зависит от абсолютной позиции в потоке.
+                    self.write_token(writer, base + pos, offset, length, buffer[pos])
+                else:
+                    yield self.make_token(buffer, pos, offset, length)
+            pos += max(length, 1)
+            if packed and len(writer.buffer) >= chunk_size:
+                yield bytes(writer.buffer)
+                writer.buffer.clear()
+
+            # Символы дальше окна больше не нужны. Удаление из начала bytearray не копирует
+            # хвост, поэтому буфер работает как кольцевой; сдвиг делается раз в chunk_size символов.
+            drop = pos - self.window_size
+            if drop >= chunk_size:
+                del buffer[:drop]
+                matcher.rebase(drop)
+                base += drop
+                pos -= drop
+
+        if packed:
+            yield writer.getvalue()
+
+    def write_token(self, writer, pos, offset, length, literal):
+        # Записывает один шаг кодирования в BitWriter в том же виде, что и в таблице
+        # print_encoded_data: 0 + 8 бит символа или 1 + смещение + код длины.
+        if length == 0:
+            writer.write(literal, 9)  # Старший (девятый) бит — флаг 0.
+            return
+        # Разрядность смещения зависит от реального размера окна в позиции pos.
+        real_window = max(1, min(pos, self.window_size))
+        writer.write(1, 1)
+        writer.write(offset, real_window.bit_length())
+        # Длина: k единиц, ноль и k младших битов длины (k + 1 — число её двоичных разрядов);
+        # при длине 1 это просто "0", как в таблице.
+        k = length.bit_length() - 1
+        writer.write((1 << (k + 1)) - 2, k + 1)
+        writer.write(length & ((1 << k) - 1), k)
+
+    def encode_to_bytes(self, data):
+        # Кодирует данные в упакованный поток битов. Строка предварительно переводится в UTF-8,
+        # чтобы одиночный символ всегда занимал 8 бит.
+        # Формат: заголовок (размер окна, длина исходных данных), затем шаги кодирования.
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        writer = BitWriter()
+        for pos, offset, length in self.parse(data):
+            self.write_token(writer, pos, offset, length, data[pos])
+        return HEADER.pack(self.window_size, len(data)) + writer.getvalue()
+
+    def encode_file(self, path, out=None):
+        # Кодирует файл в формат encode_to_bytes без чтения его в память: файл отображается
+        # через mmap, и поиск совпадений идёт прямо по memoryview его байтов (без перевода
+        # в строку и без копий срезов), так что страницы файла общие с кэшем ОС.
+        # Упакованные байты пишутся в двоичный файловый объект out по мере кодирования
+        # (возвращается число записанных байт); без out возвращаются сами байты.
+        target = io.BytesIO() if out is None else out
+        written = 0
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            written += target.write(HEADER.pack(self.window_size, size))
+            writer = BitWriter()
+            # Пустой файл отобразить нельзя — у него есть только заголовок.
+            if size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as data:
+                    for pos, offset, length in self.parse(data):
+                        self.write_token(writer, pos, offset, length, data[pos])
+                        if len(writer.buffer) >= FILE_FLUSH_SIZE:
+                            written += target.write(writer.buffer)
+                            writer.buffer.clear()
+            written += target.write(writer.getvalue())
+        return target.getvalue() if out is None else written
+
+    def decode_from_bytes(self, packed):
+        # Восстанавливает исходные байты из результата encode_to_bytes.
+        # Размер окна берётся из заголовка, а не из self.window_size.
+        window_size, total_len = HEADER.unpack_from(packed)
+        # Выходной буфер выделяется сразу целиком, если длина известна.
+        output = bytearray(total_len if total_len != UNKNOWN_LENGTH else 0)
+        pos = read_tokens(BitReader(packed, HEADER.size), output, 0, total_len, window_size)
+        del output[pos:]
+        return bytes(output)
+
+    def decode(self, encoded, text=None):
+        # Быстрое декодирование: принимает список кортежей из encode (строка или байты)
+        # либо упакованные данные (encode_to_bytes, encode_stream, compress_blocks).
+        # Тип результата для списка кортежей: text=True — строка, text=False — байты,
+        # None — по первому кортежу; пустой список без text — пустая строка (encode("")).
+        # Результат пишется в заранее выделенный буфер: символы совпадения копируются срезом,
+        # перекрывающиеся совпадения — удвоением (copy_match).
+        if isinstance(encoded, (bytes, bytearray, memoryview)):
+            if bytes(encoded[:len(BLOCK_MAGIC)]) == BLOCK_MAGIC:
+                return self.decompress_blocks(encoded)
+            return self.decode_from_bytes(encoded)
+
+        total_len = sum(length if flag else 1 for sequence, flag, distance, length, code in encoded)
+        if text is None:
+            text = not encoded or isinstance(encoded[0][0], str)
+        output = [""] * total_len if text else bytearray(total_len)
+        pos = 0
+        for sequence, flag, distance, length, code in encoded:
+            if flag == 0:
+                output[pos:pos + 1] = sequence
                 pos += 1
-            # Если совпадение найдено, кодируем подстроку.
             else:
-                # Берём подстроку длиной length из буфера предпросмотра.
-                matched_sequence = lookahead_buffer[:length]
-                # Добавляем кортеж: (подстрока, флаг=1, смещение, длина, строковый код).
-                encoded_data.append((
-                    matched_sequence,
-                    1,
-                    offset,
-                    length,
-                    f"1 {offset} {length}"
-                ))
-                # Добавляем подстроку в окно поиска.
-                search_window += matched_sequence
-                # Удаляем length символов из буфера предпросмотра.
-                lookahead_buffer = lookahead_buffer[length:]
+                # Смещение отсчитывается от последнего символа окна: расстояние = смещение + 1.
+                copy_match(output, pos, distance + 1, length)
                 pos += length
-        # Возвращаем список закодированных данных.
-        return encoded_data
+        return "".join(output) if text else bytes(output)
+
+    def compress_blocks(self, data, block_size=1 << 20, workers=None, prime=False, out=None):
+        # Блочное сжатие: вход делится на независимые блоки по block_size байт, которые
+        # сжимаются параллельно в пуле процессов (workers=None — по числу ядер).
+        # При prime=True окно каждого блока заранее заполнено последними window_size байтами
+        # предыдущего блока (словарь): сжатие лучше, но блок декодируется только вместе
+        # с предыдущими.
+        # Результат — контейнер: заголовок BLOCK_HEADER, индекс блоков (исходный и сжатый размер
+        # каждого) и сжатые блоки подряд (шаги кодирования в формате encode_to_bytes).
+        # data может быть и memoryview/mmap: блоки вырезаются по одному, в пуле одновременно
+        # не больше 2 * workers блоков, и каждый готовый блок сразу пишется в out (двоичный файл
+        # с произвольным доступом; индекс дописывается на своё место в конце). Возвращается
+        # число записанных байт; без out возвращаются сами байты контейнера.
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        target = io.BytesIO() if out is None else out
+        starts = range(0, len(data), block_size)
+        # Каждому процессу передаётся только его блок вместе со словарём.
+        prefixes = [min(start, self.window_size) if prime else 0 for start in starts]
+        base = target.tell()
+        target.write(BLOCK_HEADER.pack(BLOCK_MAGIC, self.window_size, block_size, prime, len(starts)))
+        target.write(bytes(len(starts) * BLOCK_ENTRY.size))  # Место под индекс.
+        entries = []
+
+        def pieces():
+            for start, prefix in zip(starts, prefixes):
+                yield bytes(data[start - prefix:start + block_size]), prefix
+
+        def store(piece_len, prefix, packed):
+            entries.append(BLOCK_ENTRY.pack(piece_len - prefix, len(packed)))
+            target.write(packed)
+
+        if workers == 1 or len(starts) <= 1:
+            for piece, prefix in pieces():
+                store(len(piece), prefix, compress_block(self, piece, prefix))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()  # (исходный размер, словарь, задача) в порядке блоков
+                for piece, prefix in pieces():
+                    pending.append((len(piece), prefix, executor.submit(compress_block, self, piece, prefix)))
+                    if len(pending) >= 2 * workers:
+                        piece_len, prefix, future = pending.popleft()
+                        store(piece_len, prefix, future.result())
+                while pending:
+                    piece_len, prefix, future = pending.popleft()
+                    store(piece_len, prefix, future.result())
+
+        end = target.tell()
+        target.seek(base + BLOCK_HEADER.size)
+        target.write(b"".join(entries))
+        target.seek(end)
+        return target.getvalue() if out is None else end - base
+
+    def compress_file_blocks(self, path, out=None, block_size=1 << 20, workers=None, prime=False):
+        # Блочное сжатие файла без чтения его в память: блоки вырезаются из mmap-отображения.
+        with open(path, "rb") as file:
+            if not os.fstat(file.fileno()).st_size:  # Пустой файл отобразить нельзя.
+                return self.compress_blocks(b"", block_size, workers, prime, out)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self.compress_blocks(mapped, block_size, workers, prime, out)
+
+    def decompress_block(self, container, number):
+        # Распаковывает один блок контейнера compress_blocks (произвольный доступ).
+        # Блок без словаря читается сам по себе; со словарём — после всех предыдущих.
+        window_size, primed, blocks = read_block_index(container)
+        if not 0 <= number < len(blocks):
+            raise IndexError(f"В контейнере нет блока {number}")
+        prefix = b""
+        for i in range(0 if primed else number, number + 1):
+            raw_len, offset, packed_len = blocks[i]
+            output = bytearray(len(prefix) + raw_len)
+            output[:len(prefix)] = prefix
+            reader = BitReader(container, offset)
+            read_tokens(reader, output, len(prefix), len(output), window_size)
+            if primed:
+                prefix = output[-window_size:]  # Словарь может захватывать и более ранние блоки.
+        return bytes(output[len(output) - raw_len:])
+
+    def decompress_blocks(self, container):
+        # Распаковывает весь контейнер compress_blocks.
+        window_size, primed, blocks = read_block_index(container)
+        output = bytearray(sum(raw_len for raw_len, offset, packed_len in blocks))
+        pos = 0
+        for raw_len, offset, packed_len in blocks:
+            # Словарь блока — уже распакованный хвост предыдущего блока.
+            origin = pos - min(pos, window_size) if primed else pos
+            read_tokens(BitReader(container, offset), output, pos, pos + raw_len, window_size, origin)
+            pos += raw_len
+        return bytes(output)
+
 
     def print_encoded_data(self, encoded_data):
         # Метод выводит таблицу с результатами кодирования и подсчитывает биты.
@@ -141,9 +990,23 @@ class LZ77:
         print(f"{'Итого:':>95} {total_bits} бит")
 
 
+def compress_block(lz, piece, prefix):
+    # Сжатие одного блока для compress_blocks (функция модуля, чтобы её можно было передать
+    # в пул процессов). Первые prefix байт piece — словарь из предыдущего блока.
+    writer = BitWriter()
+    for pos, offset, length in lz.parse(piece, prefix):
+        lz.write_token(writer, pos, offset, length, piece[pos])
+    return writer.getvalue()
+
 
 if __name__ == "__main__":
     input_text = "IF_WE_CANNOT_DO_AS_WE_WOULD_WE_SHOULD_DO_AS_WE_CAN"
     lz77 = LZ77(window_size=64)
     encoded = lz77.encode(input_text)
-    lz77.print_encoded_data(encoded)
\ No newline at end of file
+    lz77.print_encoded_data(encoded)
+    print()
+    for row in lz77.level_report(input_text):
+        print(f"Уровень {row['level']} ({row['parsing']}): {row['bits']} бит, "
+              f"{row['bits_per_symbol']:.3f} бит/символ, {row['symbols_per_second']:.0f} символов/с")
+    packed = lz77.encode_to_bytes(input_text)
+    print(f"Упаковано: {len(input_text)} байт -> {len(packed)} байт (заголовок {HEADER.size} байт)")
\ No newline at end of file
@@ -0,0 +1,196 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+import zlib
+
+# Файл кодировщика называется LZ-77.py (с дефисом), поэтому обычный import не подходит.
+# Модуль регистрируется в sys.modules, чтобы блочный режим мог передавать его функции в пул процессов.
+_spec = importlib.util.spec_from_file_location("lz77", os.path.join(os.path.dirname(os.path.abspath(__file__)), "LZ-77.py"))
+lz77 = importlib.util.module_from_spec(_spec)
+sys.modules["lz77"] = lz77
+_spec.loader.exec_module(lz77)
+
+SCAN_WINDOW_LIMIT = 1024  # Полный перебор окна на больших окнах слишком медленный — такие замеры пропускаются.
+
+
+# Генераторы тестового корпуса: одинаковые seed и size всегда дают одинаковые данные.
+def english_text(rng, size):
+    # Текст, похожий на английский: слова с частотами по закону Ципфа, знаки препинания.
+    words = ("the of and to in a is that for it as was with be by on not he this are or his from at "
+             "which but have an they you were her she there been one all we their has would when if so "
+             "no will can more other about what out up into them some could time only new these two may").split()
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choices(words, weights, k=rng.randint(5, 20))
+        sentence[0] = sentence[0].capitalize()
+        line = " ".join(sentence) + rng.choice([". ", ", ", "? ", ".\n"])
+        parts.append(line)
+        length += len(line)
+    return "".join(parts).encode("ascii")[:size]
+
+
+def log_lines(rng, size):
+    # Журнал сервиса: метка времени, уровень, модуль, идентификатор запроса, сообщение.
+    levels = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+    modules = ["http.server", "db.pool", "auth", "cache", "scheduler"]
+    messages = ["request completed", "connection acquired", "token refreshed", "cache miss",
+                "job scheduled", "slow query detected", "retrying operation"]
+    parts = []
+    length = 0
+    timestamp = 1_700_000_000.0
+    while length < size:
+        timestamp += rng.expovariate(50)
+        line = (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))}.{int(timestamp * 1000) % 1000:03d} "
+                f"{rng.choice(levels):<5} [{rng.choice(modules)}] req={rng.getrandbits(32):08x} "
+                f"{rng.choice(messages)} in {rng.randint(1, 999)}ms\n")
+        parts.append(line)
+        length += len(line)
+    return "".join(parts).encode("ascii")[:size]
+
+
+def random_bytes(rng, size):
+    # Несжимаемые случайные байты.
+    return rng.getrandbits(8 * size).to_bytes(size, "little") if size else b""
+
+
+def runs(rng, size):
+    # Длинные серии одного байта (вырожденный вход для поиска совпадений).
+    output = bytearray()
+    while len(output) < size:
+        output += bytes([rng.randrange(4)]) * rng.randint(1, 4096)
+    return bytes(output[:size])
+
+
+def binary_records(rng, size):
+    # Двоичные записи фиксированной структуры: номер, счётчик, число с плавающей точкой, флаги.
+    output = bytearray()
+    number = 0
+    while len(output) < size:
+        number += 1
+        output += struct.pack("<IHdB", number, rng.randint(0, 50), rng.gauss(100, 15), rng.choice((0, 1, 3)))
+    return bytes(output[:size])
+
+
+CORPUS = {
+    "english": english_text,
+    "logs": log_lines,
+    "random": random_bytes,
+    "runs": runs,
+    "binary": binary_records,
+}
+
+
+def make_corpus(size, seed=0):
+    # Словарь имя -> данные; у каждого вида данных свой генератор со своим seed.
+    return {name: generate(random.Random(f"{seed}:{name}"), size) for name, generate in CORPUS.items()}
+
+
+def measure(function, *args):
+    # Выполняет function(*args); возвращает (результат, секунды, пик памяти в байтах).
+    # tracemalloc заметно замедляет Python-код, поэтому время и память меряются в разных запусках.
+    started = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def megabytes_per_second(size, seconds):
+    return size / seconds / 1e6 if seconds else float("inf")
+
+
+def bench_lz77(data, window_size, match_finder, level):
+    # Замер кодировщика LZ77 на одних данных.
+    lz = lz77.LZ77(window_size, match_finder, level=level)
+    packed, encode_seconds, encode_peak = measure(lz.encode_to_bytes, data)
+    decoded, decode_seconds, decode_peak = measure(lz.decode, packed)
+    if decoded != data:
+        raise AssertionError(f"LZ77 ({match_finder}, окно {window_size}): декодирование не совпало с исходными данными")
+    return {
+        "encode_mb_s": megabytes_per_second(len(data), encode_seconds),
+        "decode_mb_s": megabytes_per_second(len(data), decode_seconds),
+        "encode_peak_bytes": encode_peak,
+        "decode_peak_bytes": decode_peak,
+        "compressed_bytes": len(packed),
+        "ratio": len(packed) / len(data),
+    }
+
+
+def bench_zlib(data, window_size, level):
+    # Замер zlib с теми же уровнем и окном (окно zlib — степень двойки от 2^9 до 2^15).
+    wbits = min(max((window_size - 1).bit_length(), 9), 15)
+
+    def compress(data):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        return compressor.compress(data) + compressor.flush()
+
+    packed, encode_seconds, encode_peak = measure(compress, data)
+    decoded, decode_seconds, decode_peak = measure(zlib.decompress, packed, wbits)
+    if decoded != data:
+        raise AssertionError("zlib: декодирование не совпало с исходными данными")
+    return {
+        "wbits": wbits,
+        "encode_mb_s": megabytes_per_second(len(data), encode_seconds),
+        "decode_mb_s": megabytes_per_second(len(data), decode_seconds),
+        "encode_peak_bytes": encode_peak,
+        "decode_peak_bytes": decode_peak,
+        "compressed_bytes": len(packed),
+        "ratio": len(packed) / len(data),
+    }
+
+
+def run_benchmark(size=65536, windows=(256, 4096), match_finders=("hash", "suffix", "scan"), level=6, seed=0):
+    # Полный прогон: каждый вид данных × размер окна × способ поиска совпадений.
+    corpus = make_corpus(size, seed)
+    results = []
+    for name, data in corpus.items():
+        for window_size in windows:
+            row = {"corpus": name, "size": len(data), "window_size": window_size, "level": level,
+                   "zlib": bench_zlib(data, window_size, level), "lz77": {}}
+            for match_finder in match_finders:
+                if match_finder == "scan" and window_size > SCAN_WINDOW_LIMIT:
+                    row["lz77"][match_finder] = {"skipped": f"окно больше {SCAN_WINDOW_LIMIT}"}
+                    continue
+                row["lz77"][match_finder] = bench_lz77(data, window_size, match_finder, level)
+            results.append(row)
+            print(f"{name:<8} окно {window_size:<6} готово", file=sys.stderr)
+    return {
+        "python": sys.version.split()[0],
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры LZ77 на сгенерированном корпусе в сравнении с zlib")
+    parser.add_argument("--size", type=int, default=65536, help="размер каждого вида данных в байтах")
+    parser.add_argument("--windows", type=int, nargs="+", default=[256, 4096], help="размеры окна")
+    parser.add_argument("--finders", nargs="+", default=list(lz77.MATCH_FINDERS), choices=list(lz77.MATCH_FINDERS),
+                        help="способы поиска совпадений")
+    parser.add_argument("--level", type=int, default=6, choices=list(lz77.LEVELS), help="уровень сжатия")
+    parser.add_argument("--seed", type=int, default=0, help="seed генератора корпуса")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию — стандартный вывод)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.size, args.windows, args.finders, args.level, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,504 @@
+import contextlib
+import itertools
+import math
+import multiprocessing
+import os
+import queue
 import random
+import struct
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-# Функция генерации пары ключей
-def create_key_pair():
-    p = make_prime()  # Генерируем первое простое число p
-    q = make_prime()  # Генерируем второе простое число q
+import numtheory
+
+# Функция генерации пары ключей (bits — размер каждого из простых p и q)
+def create_key_pair(bits=32):
+    p = make_prime(bits)  # Генерируем первое простое число p
+    q = make_prime(bits)  # Генерируем второе простое число q
     while p == q:           # Проверяем, что p и q разные
-        q = make_prime()    # Если одинаковые, генерируем новое q
+        q = make_prime(bits)    # Если одинаковые, генерируем новое q
+    return key_pair_from_primes(p, q)
+
+# Функция вычисления ключей по готовым различным простым p и q
+def key_pair_from_primes(p, q):
     modulus = p * q         # Вычисляем модуль n = p * q
     phi = (p - 1) * (q - 1)  # Вычисляем функцию Эйлера phi = (p-1) * (q-1)
     public_exp = select_public_exponent(phi)        # Выбираем экспоненту e
     private_exp = compute_inverse(public_exp, phi)  # Вычисляем экспоненту d
     return public_exp, private_exp, modulus, p, q
 
-# Функция генерации большого простого числа
+# Открытый ключ (e, n)
+class PublicKey:
+    def __init__(self, public_exp, modulus):
+        self.public_exp = public_exp  # Экспонента e
+        self.modulus = modulus        # Модуль n
+
+    # Шифрование числа: m^e mod n
+    def encrypt(self, num):
+        return fast_pow(num, self.public_exp, self.modulus)
+
+# Закрытый ключ с параметрами для китайской теоремы об остатках:
+# dP = d mod (p-1), dQ = d mod (q-1), qInv = q^-1 mod p
+class PrivateKey:
+    def __init__(self, public_exp, private_exp, modulus, p, q):
+        self.private_exp = private_exp  # Экспонента d
+        self.modulus = modulus          # Модуль n
+        self.p = p
+        self.q = q
+        self.d_p = private_exp % (p - 1)
+        self.d_q = private_exp % (q - 1)
+        self.q_inv = compute_inverse(q, p)
+        self.public_key = PublicKey(public_exp, modulus)  # Парный открытый ключ
+
+    # Все параметры ключа: (e, d, n, p, q, dP, dQ, qInv)
+    def parameters(self):
+        return (self.public_key.public_exp, self.private_exp, self.modulus, self.p, self.q,
+                self.d_p, self.d_q, self.q_inv)
+
+    # Ключ из сохранённых параметров, без повторного вычисления dP, dQ, qInv
+    @classmethod
+    def from_parameters(cls, public_exp, private_exp, modulus, p, q, d_p, d_q, q_inv):
+        key = cls.__new__(cls)
+        key.private_exp, key.modulus, key.p, key.q = private_exp, modulus, p, q
+        key.d_p, key.d_q, key.q_inv = d_p, d_q, q_inv
+        key.public_key = PublicKey(public_exp, modulus)
+        return key
+
+    # Дешифрование числа через КТО: два возведения в степень по модулям вдвое меньшей длины
+    # с показателями вдвое меньшей длины вместо одного num^d mod n
+    def decrypt(self, num):
+        m_p = fast_pow(num % self.p, self.d_p, self.p)  # num^d mod p
+        m_q = fast_pow(num % self.q, self.d_q, self.q)  # num^d mod q
+        h = self.q_inv * (m_p - m_q) % self.p           # Склейка по формуле Гарнера
+        return m_q + h * self.q
+
+# Функция генерации ключей в виде объектов: возвращает (открытый ключ, закрытый ключ)
+def create_keys(bits=32):
+    public_exp, private_exp, modulus, p, q = create_key_pair(bits)
+    private_key = PrivateKey(public_exp, private_exp, modulus, p, q)
+    return private_key.public_key, private_key
+
+# Функция поиска простого числа в процессе пула. После fork у всех процессов одинаковое
+# состояние random, поэтому генератор заново инициализируется из os.urandom
+def generate_prime(bits):
+    random.seed()
+    return make_prime(bits)
+
+# Функция параллельной генерации ключей: workers процессов ищут простые одновременно,
+# первые два различных становятся p и q, остальные процессы сразу останавливаются
+def create_keys_parallel(bits=32, workers=None):
+    if bits < 3:
+        raise ValueError("Для двух различных простых нужно хотя бы 3 бита")
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers) as pool:  # Выход из with вызывает terminate()
+        primes = pool.imap_unordered(generate_prime, [bits] * max(workers, 2))
+        p = next(primes)
+        q = next(primes)
+        while q == p:
+            q = pool.apply(generate_prime, (bits,))
+    private_key = PrivateKey(*key_pair_from_primes(p, q))
+    return private_key.public_key, private_key
+
+# Запас заранее сгенерированных ключей. Процессы пула ищут простые в фоне, пока в запасе
+# меньше size ключей; get() отдаёт готовый ключ сразу и заказывает замену
+class KeyPool:
+    def __init__(self, bits=32, size=16, workers=None):
+        if bits < 3:  # Меньше 3 бит нет двух различных простых: пул ждал бы ключей вечно
+            raise ValueError("Для двух различных простых нужно хотя бы 3 бита")
+        self.bits = bits
+        self.size = size
+        self.keys = queue.Queue()  # Готовые пары (открытый ключ, закрытый ключ) или исключение
+        self.lock = threading.Lock()
+        self.spare = None          # Простое число, ждущее пару
+        self.in_flight = 0         # Заказанных, но ещё не найденных простых
+        self.closed = False
+        workers = workers or os.cpu_count() or 1
+        self.pool = multiprocessing.Pool(workers)
+        self.max_in_flight = 2 * workers
+        self._refill()
+
+    # Заказывает простые числа, пока ключей в запасе и в работе меньше size
+    def _refill(self):
+        with self.lock:
+            while (not self.closed and self.in_flight < self.max_in_flight
+                   and self.keys.qsize() + (self.in_flight + (self.spare is not None)) // 2 < self.size):
+                self.pool.apply_async(generate_prime, (self.bits,),
+                                      callback=self._on_prime, error_callback=self._on_error)
+                self.in_flight += 1
+
+    # Вызывается в потоке результатов пула: два различных простых образуют ключ
+    def _on_prime(self, prime):
+        with self.lock:
+            self.in_flight -= 1
+            if self.spare is None:
+                self.spare = prime
+            elif prime != self.spare:
+                try:
+                    private_key = PrivateKey(*key_pair_from_primes(self.spare, prime))
+                    self.keys.put((private_key.public_key, private_key))
+                except Exception as error:  # Исключение в потоке пула никто бы не увидел
+                    self.keys.put(error)
+                self.spare = None
+        self._refill()
+
+    # Вызывается при ошибке в процессе: ошибка передаётся тому, кто ждёт ключ,
+    # а вместо упавшего поиска заказывается новый
+    def _on_error(self, error):
+        with self.lock:
+            self.in_flight -= 1
+        self.keys.put(error)
+        self._refill()
+
+    # Выдаёт пару (открытый ключ, закрытый ключ); ждёт, если запас пуст.
+    # Ошибка генерации поднимается здесь; замена заказывается в любом случае
+    def get(self, timeout=None):
+        key = self.keys.get(timeout=timeout)
+        self._refill()
+        if isinstance(key, BaseException):
+            raise key
+        return key
+
+    # Останавливает процессы пула; ключи, уже лежащие в запасе, пропадают
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Хранилище ключей в файле. Формат: сигнатура STORE_MAGIC, затем записи подряд:
+# длина имени (2 байта), имя в UTF-8, размер простых в битах (2 байта) и восемь параметров
+# PrivateKey.parameters(), каждый — длина (2 байта) и число big-endian.
+# При повторе имени и размера действует последняя запись. Файл содержит закрытые ключи, поэтому
+# создаётся с правами 0o600; процессы согласуются блокировкой fcntl.flock на файле path + ".lock"
+# (где fcntl нет, например в Windows, блокировки между процессами нет)
+STORE_MAGIC = b"RSAK"
+STORE_LENGTH = struct.Struct(">H")
+
+class KeyStore:
+    def __init__(self, path):
+        self.path = path
+        self.offsets = None  # (имя, биты) -> смещение записи; читается при первом обращении
+        self.end = 0         # Конец последней целой записи (дальше может быть обрезанный хвост)
+        self.keys = {}       # Уже разобранные ключи
+        self.file_id = None  # (st_dev, st_ino) файла, из которого разобраны ключи
+
+    # Открывает файл только для владельца (права 0o600, в том числе у уже существующего файла)
+    @staticmethod
+    def _open_private(path, flags):
+        fd = os.open(path, flags | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o600)
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+        return fd
+
+    # Блокировка хранилища между процессами: разделяемая для чтения, исключительная для записи
+    @contextlib.contextmanager
+    def _locked(self, exclusive=False):
+        try:
+            import fcntl
+        except ImportError:  # Нет fcntl (Windows): хранилищем пользуется один процесс
+            fcntl = None
+        if fcntl is None:
+            yield
+            return
+        fd = self._open_private(self.path + ".lock", os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)  # Закрытие снимает блокировку
+
+    # Имя и размер ключа хранятся в записи 16-битными полями; проверяется до создания ключа
+    @staticmethod
+    def _check_key(name, bits):
+        limit = 1 << 8 * STORE_LENGTH.size
+        if len(name.encode("utf-8")) >= limit:
+            raise ValueError(f"Имя ключа длиннее {limit - 1} байт в UTF-8")
+        if not 2 <= bits < limit:
+            raise ValueError(f"Размер простых должен быть от 2 до {limit - 1} бит, а не {bits}")
+
+    # Читает ровно size байт; короткое чтение — обрезанная запись
+    @staticmethod
+    def _read_exact(file, size):
+        data = file.read(size)
+        if len(data) != size:
+            raise ValueError("Запись хранилища ключей обрезана")
+        return data
+
+    # Читает заголовок записи: (имя, биты); файл остаётся на первом параметре
+    def _read_header(self, file):
+        size = STORE_LENGTH.unpack(self._read_exact(file, STORE_LENGTH.size))[0]
+        name = self._read_exact(file, size).decode("utf-8")
+        return name, STORE_LENGTH.unpack(self._read_exact(file, STORE_LENGTH.size))[0]
+
+    # Читает из файла только заголовки записей; параметры ключей пропускаются.
+    # Обрезанная последняя запись (сбой во время дописывания) не учитывается: записи до неё
+    # читаются, а хвост отрезается при следующей записи в хранилище
+    # Разобранный ключ остаётся в кэше, пока его запись на месте: в том же файле (rotate заменяет
+    # файл целиком) и по тому же смещению
+    def _load_index(self):
+        previous = self.offsets or {}
+        self.offsets = {}
+        self.end = 0
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            self.keys, self.file_id = {}, None
+            return
+        with file:
+            stat = os.fstat(file.fileno())
+            size = stat.st_size
+            if (stat.st_dev, stat.st_ino) != self.file_id:
+                self.keys, self.file_id = {}, (stat.st_dev, stat.st_ino)
+            magic = file.read(len(STORE_MAGIC))
+            if magic != STORE_MAGIC:
+                if len(magic) < len(STORE_MAGIC) and STORE_MAGIC.startswith(magic):
+                    return  # Сбой при создании файла — хранилище пусто
+                raise ValueError(f"{self.path}: файл не является хранилищем ключей")
+            self.end = file.tell()
+            while self.end < size:
+                try:
+                    key = self._read_header(file)
+                    for _ in range(8):
+                        length = STORE_LENGTH.unpack(self._read_exact(file, STORE_LENGTH.size))[0]
+                        if file.tell() + length > size:
+                            raise ValueError("Запись хранилища ключей обрезана")
+                        file.seek(length, os.SEEK_CUR)
+                except (ValueError, UnicodeDecodeError):
+                    break
+                self.offsets[key] = self.end
+                if previous.get(key) != self.end:
+                    self.keys.pop(key, None)  # В файле ключ новее разобранного
+                self.end = file.tell()
+
+    # Разбирает запись по смещению и проверяет, что это запись нужного ключа
+    def _read_key(self, key, offset):
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            if self._read_header(file) != key:
+                raise ValueError(f"{self.path}: запись по смещению {offset} не относится к ключу {key}")
+            parameters = []
+            for _ in range(8):
+                size = STORE_LENGTH.unpack(self._read_exact(file, STORE_LENGTH.size))[0]
+                parameters.append(int.from_bytes(self._read_exact(file, size), "big"))
+        return PrivateKey.from_parameters(*parameters)
+
+    @staticmethod
+    def _record(name, bits, private_key):
+        name = name.encode("utf-8")
+        record = bytearray(STORE_LENGTH.pack(len(name)) + name + STORE_LENGTH.pack(bits))
+        for value in private_key.parameters():
+            value = value.to_bytes((value.bit_length() + 7) // 8, "big")
+            record += STORE_LENGTH.pack(len(value)) + value
+        return bytes(record)
+
+    # Записывает все байты data в дескриптор
+    @staticmethod
+    def _write_all(fd, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    # Дописывает ключ в конец файла одной записью (вызывается под исключительной блокировкой,
+    # после _load_index). Обрезанный хвост от прошлого сбоя сначала отрезается
+    def _append(self, name, bits, private_key):
+        data = self._record(name, bits, private_key)
+        offset = self.end
+        if not offset:  # Новый (или пустой) файл: сигнатура уходит вместе с первой записью
+            data = STORE_MAGIC + data
+            offset = len(STORE_MAGIC)
+        fd = self._open_private(self.path, os.O_WRONLY)
+        try:
+            stat = os.fstat(fd)
+            self.file_id = (stat.st_dev, stat.st_ino)
+            os.ftruncate(fd, self.end)
+            os.lseek(fd, self.end, os.SEEK_SET)
+            self._write_all(fd, data)
+        finally:
+            os.close(fd)
+        self.offsets[name, bits] = offset
+        self.end += len(data)
+
+    # Возвращает (открытый ключ, закрытый ключ) по имени и размеру; ключ создаётся только при промахе.
+    # Индекс перечитывается под блокировкой, поэтому ключ, созданный другим процессом, не дублируется
+    def get(self, name, bits=32):
+        self._check_key(name, bits)
+        key = (name, bits)
+        if key not in self.keys:
+            with self._locked():
+                self._load_index()
+                if key in self.offsets:
+                    self.keys[key] = self._read_key(key, self.offsets[key])
+        if key not in self.keys:
+            with self._locked(exclusive=True):
+                self._load_index()  # Пока ждали блокировку, ключ мог создать другой процесс
+                if key in self.offsets:
+                    self.keys[key] = self._read_key(key, self.offsets[key])
+                else:
+                    private_key = create_keys(bits)[1]
+                    self._append(name, bits, private_key)
+                    self.keys[key] = private_key
+        private_key = self.keys[key]
+        return private_key.public_key, private_key
+
+    # Заменяет ключ новым. Файл переписывается целиком (через временный файл с правами 0o600
+    # и os.replace), старые записи и обрезанный хвост при этом выбрасываются
+    def rotate(self, name, bits=32):
+        self._check_key(name, bits)
+        with self._locked(exclusive=True):
+            self._load_index()
+            keys = {key: self._read_key(key, offset) for key, offset in self.offsets.items()}
+            keys[name, bits] = create_keys(bits)[1]
+            data = bytearray(STORE_MAGIC)
+            offsets = {}
+            for key, private_key in keys.items():
+                offsets[key] = len(data)
+                data += self._record(*key, private_key)
+            temporary = self.path + ".tmp"
+            fd = self._open_private(temporary, os.O_WRONLY | os.O_TRUNC)
+            try:
+                self._write_all(fd, data)
+            finally:
+                os.close(fd)
+            os.replace(temporary, self.path)
+            stat = os.stat(self.path)
+            self.keys, self.offsets, self.end = keys, offsets, len(data)
+            self.file_id = (stat.st_dev, stat.st_ino)
+        private_key = self.keys[name, bits]
+        return private_key.public_key, private_key
+
+# Функция построения списка простых чисел меньше limit (решето Эратосфена)
+def small_primes(limit):
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b"\0\0"
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))  # Вычёркиваем кратные i
+    return [i for i, is_prime in enumerate(sieve) if is_prime]
+
+SIEVE_PRIMES = small_primes(17864)[1:]  # Первые 2048 простых без двойки (кандидаты и так нечётные)
+
+# Функция генерации большого простого числа.
+# Берётся одно случайное нечётное начало, и окно кандидатов start, start + 2, ... просеивается
+# по остаткам от деления на малые простые; тест простоты запускается только для оставшихся
 def make_prime(bits=32):
+    if bits < 2:
+        raise ValueError("Простое число должно иметь хотя бы 2 бита")
+    window = max(64, 4 * bits)  # Кандидатов в окне: простое встречается примерно раз на 0.35 * bits нечётных
+    # Просеивание стоит одинаково для любого размера, а тест простоты — примерно bits^3, поэтому
+    # малым числам выгодно короткое решето: простых в нём берётся bits^2 / 128 (все — от 512 бит)
+    sieve_primes = SIEVE_PRIMES[:max(8, bits * bits // 128)]
     while True:
-        num = random.getrandbits(bits)  # Генерируем случайное число с заданным количеством бит
-        num |= (1 << bits - 1) | 1      # Устанавливаем старший и младший биты (для нечётности и размера)
-        if check_prime(num):  # Проверяем, является ли число простым
-            return num
+        start = random.getrandbits(bits)   # Генерируем случайное число с заданным количеством бит
+        start |= (1 << bits - 1) | 1       # Устанавливаем старший и младший биты (для нечётности и размера)
+        while start < 1 << bits:           # Окна идут подряд, пока кандидаты не выйдут за bits бит
+            candidates = bytearray([1]) * window  # candidates[i] — отметка для числа start + 2i
+            for p in sieve_primes:
+                if p >= start:  # Малое простое не может быть делителем самого себя
+                    break
+                # start + 2i делится на p при i = -start / 2 (mod p)
+                first = (p - start % p) * ((p + 1) // 2) % p
+                candidates[first::p] = bytes(len(range(first, window, p)))
+            for i in range(window):
+                num = start + 2 * i
+                if num >> bits:  # Кандидат длиннее bits бит — берём новое начало
+                    break
+                if candidates[i] and check_prime(num):  # Проверяем, является ли число простым
+                    return num
+            start += 2 * window
 
-# Функция проверки числа на простоту
-def check_prime(n, tests=20):
+# Основания, при которых тест Миллера — Рабина точен для всех n меньше границы
+MR_WITNESSES = [
+    (2047, [2]),
+    (1373653, [2, 3]),
+    (25326001, [2, 3, 5]),
+    (3215031751, [2, 3, 5, 7]),
+    (2152302898747, [2, 3, 5, 7, 11]),
+    (3474749660383, [2, 3, 5, 7, 11, 13]),
+    (341550071728321, [2, 3, 5, 7, 11, 13, 17]),
+    (3825123056546413051, [2, 3, 5, 7, 11, 13, 17, 19, 23]),
+    (1 << 64, [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]),
+]
+
+# Функция одного раунда теста Миллера — Рабина по основанию a (n - 1 = 2^s * d)
+def miller_rabin(n, a, d, s):
+    x = fast_pow(a, d, n)       # Вычисляем a^d mod n
+    if x == 1 or x == n - 1:    # Если x = 1 или x = n-1, тест пройден
+        return True
+    for _ in range(s - 1):      # Проверяем последовательные квадраты
+        x = x * x % n           # Вычисляем x^2 mod n
+        if x == n - 1:          # Если x = n-1, тест пройден
+            return True
+    return False
+
+# Функция сильного теста Люка с параметрами Селфриджа: D — первое из 5, -7, 9, -11, ...
+# с символом Якоби (D/n) = -1, P = 1, Q = (1 - D) / 4. n — нечётное, без малых делителей
+def strong_lucas_test(n):
+    D = 5
+    while True:
+        symbol = numtheory.jacobi(D, n)
+        if symbol == -1:
+            break
+        if symbol == 0:  # Общий делитель с D (|D| < n) — составное
+            return False
+        if D == 29 and math.isqrt(n) ** 2 == n:  # У полного квадрата такого D нет
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+    d = n + 1   # n + 1 = 2^s * d
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def half(x):  # x / 2 mod n
+        return (x + n if x & 1 else x) >> 1
+
+    # U_k, V_k, Q^k по битам d слева направо (P = 1)
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V, Qk = U * V % n, (V * V - 2 * Qk) % n, Qk * Qk % n  # k -> 2k
+        if bit == "1":  # 2k -> 2k + 1
+            U, V, Qk = half(U + V) % n, half(D * U + V) % n, Qk * Q % n
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):  # V_{2^r * d} для r = 1 .. s-1
+        V, Qk = (V * V - 2 * Qk) % n, Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+# Функция проверки числа на простоту.
+# n < 2^64 — тест Миллера — Рабина с детерминированным набором оснований (ответ точный);
+# больше — тест Бейли — PSW: сильный тест по основанию 2 и сильный тест Люка (контрпримеры неизвестны).
+# tests — дополнительные раунды Миллера — Рабина со случайными основаниями
+def check_prime(n, tests=0):
     if n < 2:  # Если число меньше 2, оно не простое
         return False
     for p in [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]:  # Проверяем делимость на малые простые числа
         if n % p == 0:      # Если делится на p
             return n == p   # Число простое, только если оно равно p
+    if n < 31 * 31:  # Нет делителей до 29 — простое
+        return True
     d = n - 1   # Инициализируем d
     s = 0       # Инициализируем счётчик делений на 2
     while d % 2 == 0:   # Разлагаем n-1 на 2^s * d
         d //= 2         # Делим d на 2
         s += 1
-    for _ in range(tests):  # Проводим tests итераций теста
-        a = random.randint(2, n - 2)  # Выбираем случайное число a
-        x = fast_pow(a, d, n)            # Вычисляем a^d mod n
-        if x == 1 or x == n - 1:         # Если x = 1 или x = n-1, тест пройден
-            continue
-        for __ in range(s - 1):     # Проверяем последовательные квадраты
-            x = fast_pow(x, 2, n)  # Вычисляем x^2 mod n
-            if x == n - 1:  # Если x = n-1, тест пройден
-                break
-        else:
+    if n < 1 << 64:
+        witnesses = next(witnesses for limit, witnesses in MR_WITNESSES if n < limit)
+        if not all(miller_rabin(n, a, d, s) for a in witnesses):
+            return False
+    elif not miller_rabin(n, 2, d, s) or not strong_lucas_test(n):
+        return False
+    for _ in range(tests):  # Проводим tests дополнительных итераций теста
+        if not miller_rabin(n, random.randint(2, n - 2), d, s):
             return False
     return True
 
@@ -58,29 +515,138 @@ def select_public_exponent(phi):
 
 # Функция вычисления НОД
 def compute_gcd(a, b):
-    while b:  # Пока b не равно 0
-        a, b = b, a % b  # Обновляем a и b по алгоритму Евклида
-    return a  # Возвращаем НОД
+    return numtheory.gcd(a, b)
 
-# Вычисление модульного обратного с использованием алгоритма Евклида
+# Вычисление модульного обратного итеративным расширенным алгоритмом Евклида
 def compute_inverse(a, m):
-    def extended_euclid(a, b):  # Внутренняя функция для расширенного алгоритма Евклида
-        if b == 0:          # Если b равно 0
-            return a, 1, 0  # Возвращаем НОД и коэффициенты
-        else:
-            g, x, y = extended_euclid(b, a % b)  # Получаем НОД и коэффициенты
-            return g, y, x - (a // b) * y        # Вычисляем новые коэффициенты
-    g, x, y = extended_euclid(a, m)  # Вызываем расширенный алгоритм Евклида
-    if g != 1:  # Если НОД не равен 1
-        raise ValueError("Обратного элемента не существует")
-    return x % m  # Возвращаем модульный обратный элемент
-
-# Функция шифрования текста
-def encode_text(text, public_exp, modulus):
+    return numtheory.mod_inverse(a, m)  # ValueError, если обратного элемента не существует
+
+# Функция шифрования текста (ключ — PublicKey или пара public_exp, modulus)
+def encode_text(text, public_exp, modulus=None):
+    if isinstance(public_exp, PublicKey):
+        return [public_exp.encrypt(ord(c)) for c in text]
     return [fast_pow(ord(c), public_exp, modulus) for c in text]  # Шифруем каждый символ (ord(c)^e mod n)
 
-# Функция быстрого возведения в степень
-def fast_pow(base, exponent, modulus):
+# Функция вычисления размеров блоков для модуля: (байт данных в блоке, байт шифротекста в блоке).
+# Блок данных — байт 0x01 и за ним данные: старшая единица сохраняет ведущие нули и длину
+# последнего неполного блока, а число остаётся меньше 2^(bits-1) <= n
+def block_sizes(modulus):
+    plain_size = (modulus.bit_length() - 1) // 8 - 1
+    if plain_size < 1:
+        raise ValueError("Модуль слишком мал для блочного шифрования")
+    return plain_size, (modulus.bit_length() + 7) // 8
+
+# Функция блочного шифрования байтов открытым ключом PublicKey; результат — байты,
+# по cipher_size байт на каждый блок из plain_size байт данных
+def encrypt_bytes(data, public_key):
+    plain_size, cipher_size = block_sizes(public_key.modulus)
+    output = bytearray()
+    for start in range(0, len(data), plain_size):
+        block = int.from_bytes(b"\x01" + data[start:start + plain_size], "big")
+        output += public_key.encrypt(block).to_bytes(cipher_size, "big")
+    return bytes(output)
+
+# Функция блочного дешифрования результата encrypt_bytes закрытым ключом PrivateKey
+def decrypt_bytes(data, private_key):
+    plain_size, cipher_size = block_sizes(private_key.modulus)
+    if len(data) % cipher_size:
+        raise ValueError("Длина шифротекста не кратна размеру блока")
+    output = bytearray()
+    for start in range(0, len(data), cipher_size):
+        num = int.from_bytes(data[start:start + cipher_size], "big")
+        if num >= private_key.modulus:
+            raise ValueError("Блок шифротекста больше модуля")
+        block = private_key.decrypt(num)
+        block = block.to_bytes((block.bit_length() + 7) // 8, "big")
+        if not block or block[0] != 1 or len(block) > plain_size + 1:  # Нет маркера 0x01 — ключ не тот или данные повреждены
+            raise ValueError("Некорректный блок при дешифровании")
+        output += block[1:]
+    return bytes(output)
+
+# Функции блочного шифрования и дешифрования текста (UTF-8)
+def encode_text_blocks(text, public_key):
+    return encrypt_bytes(text.encode("utf-8"), public_key)
+
+def decode_text_blocks(data, private_key):
+    return decrypt_bytes(data, private_key).decode("utf-8")
+
+# Заголовок потока шифротекста: сигнатура и размер блока шифротекста в байтах.
+# За ним идут блоки encrypt_bytes фиксированной длины; последний блок данных может быть неполным
+STREAM_MAGIC = b"RSAS"
+STREAM_HEADER = struct.Struct(">4sH")
+
+# Функция чтения файла частями по chunk_size байт
+def read_chunks(source, chunk_size=65536):
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+# Функция перераспределения потока байтов на части длиной, кратной size.
+# Последняя часть — остаток (может быть пустой, если данные кончились ровно на границе)
+def aligned_chunks(chunks, size):
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        whole = len(buffer) - len(buffer) % size
+        if whole:
+            yield buffer[:whole]
+            buffer = buffer[whole:]
+    yield buffer
+
+# Функция потокового шифрования: chunks — итерируемые байтовые части открытого текста,
+# генератор выдаёт заголовок и блоки шифротекста. В памяти не больше одной части
+def encrypt_chunks(chunks, public_key):
+    plain_size, cipher_size = block_sizes(public_key.modulus)
+    yield STREAM_HEADER.pack(STREAM_MAGIC, cipher_size)
+    for chunk in aligned_chunks(chunks, plain_size):
+        if chunk:
+            yield encrypt_bytes(chunk, public_key)
+
+# Функция потокового дешифрования результата encrypt_chunks.
+# workers = 1 — дешифрование в текущем процессе; иначе части дешифруются в пуле процессов
+# (None — по числу ядер), в работе одновременно не больше 2 * workers частей, порядок сохраняется
+def decrypt_chunks(chunks, private_key, workers=1):
+    plain_size, cipher_size = block_sizes(private_key.modulus)
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:  # Набираем байты заголовка
+        head += chunk
+        if len(head) >= STREAM_HEADER.size:
+            break
+    if len(head) < STREAM_HEADER.size or head[:4] != STREAM_MAGIC:
+        raise ValueError("Поток не является шифротекстом RSA")
+    size = STREAM_HEADER.unpack(head[:STREAM_HEADER.size])[1]
+    if size != cipher_size:
+        raise ValueError(f"Размер блока {size} не соответствует ключу ({cipher_size})")
+    body = itertools.chain([head[STREAM_HEADER.size:]], chunks)  # Остаток первой части — начало данных
+    blocks = (chunk for chunk in aligned_chunks(body, cipher_size) if chunk)
+    if workers == 1:
+        for chunk in blocks:
+            yield decrypt_bytes(chunk, private_key)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in blocks:
+            pending.append(pool.submit(decrypt_bytes, chunk, private_key))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# Функции шифрования и дешифрования файлов: source и target — файловые объекты в двоичном режиме
+def encrypt_file(source, target, public_key, chunk_size=65536):
+    for chunk in encrypt_chunks(read_chunks(source, chunk_size), public_key):
+        target.write(chunk)
+
+def decrypt_file(source, target, private_key, chunk_size=65536, workers=1):
+    for chunk in decrypt_chunks(read_chunks(source, chunk_size), private_key, workers):
+        target.write(chunk)
+
+# Функция быстрого возведения в степень (двоичный метод справа налево)
+def binary_pow(base, exponent, modulus):
     result = 1
     while exponent > 0:  # Пока экспонента больше 0
         if exponent % 2 == 1:  # Если текущий бит экспоненты равен 1
@@ -89,12 +655,85 @@ def fast_pow(base, exponent, modulus):
         exponent = exponent // 2  # Делим экспоненту на 2
     return result
 
-# Функция дешифрования текста
-def decode_text(encoded, private_exp, modulus):
+# Функция выбора ширины окна по длине показателя: таблица из 2^(w-1) нечётных степеней
+# окупается, когда показатель длинный
+def window_width(bits):
+    for width, limit in ((1, 8), (2, 24), (3, 64), (4, 192), (5, 512)):
+        if bits <= limit:
+            return width
+    return 6
+
+# Функция возведения в степень скользящим окном (слева направо).
+# Заранее считаются base^1, base^3, ..., base^(2^w - 1); каждое окно показателя, начинающееся
+# и заканчивающееся единицей, стоит одного умножения на степень из таблицы
+def sliding_window_pow(base, exponent, modulus, width=None):
+    if modulus == 1:
+        return 0
+    base %= modulus
+    width = width or window_width(exponent.bit_length())
+    square = base * base % modulus
+    table = [base]  # table[j] = base^(2j + 1)
+    for _ in range((1 << width - 1) - 1):
+        table.append(table[-1] * square % modulus)
+    result = 1
+    i = exponent.bit_length() - 1
+    while i >= 0:
+        if not (exponent >> i) & 1:  # Нулевой бит — только возведение в квадрат
+            result = result * result % modulus
+            i -= 1
+            continue
+        low = max(i - width + 1, 0)  # Окно [low, i], сдвигаем low до единичного бита
+        while not (exponent >> low) & 1:
+            low += 1
+        for _ in range(i - low + 1):
+            result = result * result % modulus
+        result = result * table[((exponent >> low) & ((1 << i - low + 1) - 1)) >> 1] % modulus
+        i = low - 1
+    return result
+
+# Функция возведения в степень лестницей Монтгомери: на каждом бите показателя ровно одно
+# умножение и одно возведение в квадрат, независимо от значения бита. Последовательность
+# операций не зависит от секретного показателя (время самих операций над int в Python
+# от значений всё же зависит, поэтому это защита от простого анализа, а не строгая гарантия)
+def ladder_pow(base, exponent, modulus):
+    r0, r1 = 1 % modulus, base % modulus  # Инвариант: r1 = r0 * base
+    for i in range(exponent.bit_length() - 1, -1, -1):
+        if (exponent >> i) & 1:
+            r0, r1 = r0 * r1 % modulus, r1 * r1 % modulus
+        else:
+            r0, r1 = r0 * r0 % modulus, r0 * r1 % modulus
+    return r0
+
+# Способы возведения в степень по модулю; fast_pow вызывает выбранный.
+# По умолчанию встроенный pow: он написан на C и быстрее всех реализаций на Python
+POW_BACKENDS = {
+    "builtin": pow,
+    "binary": binary_pow,
+    "window": sliding_window_pow,
+    "ladder": ladder_pow,
+}
+pow_backend = "builtin"
+
+# Функция выбора способа возведения в степень
+def set_pow_backend(name):
+    global pow_backend
+    if name not in POW_BACKENDS:
+        raise ValueError(f"Неизвестный способ возведения в степень: {name}")
+    pow_backend = name
+
+# Функция быстрого возведения в степень
+def fast_pow(base, exponent, modulus):
+    return POW_BACKENDS[pow_backend](base, exponent, modulus)
+
+# Функция дешифрования текста (ключ — PrivateKey, тогда через КТО, или пара private_exp, modulus)
+def decode_text(encoded, private_exp, modulus=None):
     """Дешифрование текста"""
     decrypted = []  # Создаём список для дешифрованных чисел
     for num in encoded:  # Перебираем зашифрованные числа
-        decrypted_num = fast_pow(num, private_exp, modulus)  # Дешифруем: num^d mod n
+        if isinstance(private_exp, PrivateKey):
+            decrypted_num = private_exp.decrypt(num)  # Дешифруем через КТО
+        else:
+            decrypted_num = fast_pow(num, private_exp, modulus)  # Дешифруем: num^d mod n
         if decrypted_num > 0x10FFFF:  # Проверяем, не превышает ли число максимальный код Unicode
             raise ValueError("Некорректное значение при дешифровании")  # Ошибка при большом значении
         decrypted.append(decrypted_num)  # Добавляем дешифрованное число в список
@@ -105,24 +744,29 @@ def decode_text(encoded, private_exp, modulus):
 
 # Основная функция программы
 def main():
-    public_key, private_key, modulus, p, q = create_key_pair()  # Генерируем ключи
+    public_key, private_key = create_keys()  # Генерируем ключи
     print("Генерация ключей...")
-    print(f"Простое число p: {p}")
-    print(f"Простое число q: {q}")
-    print(f"Открытый ключ (e, n): ({public_key}, {modulus})")
-    print(f"Закрытый ключ (d, n): ({private_key}, {modulus})")
+    print(f"Простое число p: {private_key.p}")
+    print(f"Простое число q: {private_key.q}")
+    print(f"Открытый ключ (e, n): ({public_key.public_exp}, {public_key.modulus})")
+    print(f"Закрытый ключ (d, n): ({private_key.private_exp}, {private_key.modulus})")
 
     message = "Hello 123"
     print(f"\nИсходное сообщение: {message}")
 
     print("\nШифрование...")
-    encrypted = encode_text(message, public_key, modulus)
+    encrypted = encode_text(message, public_key)
     print("Зашифрованное сообщение:", encrypted)
 
     print("\nДешифрование...")
-    decrypted = decode_text(encrypted, private_key, modulus)
+    decrypted = decode_text(encrypted, private_key)
     print("Расшифрованное сообщение:", decrypted)
 
+    print("\nБлочное шифрование...")
+    encrypted = encode_text_blocks(message, public_key)
+    print("Зашифрованное сообщение:", encrypted.hex())
+    print("Расшифрованное сообщение:", decode_text_blocks(encrypted, private_key))
+
 # Точка входа в программу
 if __name__ == "__main__":
     main()
\ No newline at end of file
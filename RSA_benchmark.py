@@ -0,0 +1,80 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+import RSA
+
+
+def time_call(function, args, min_seconds):
+    # Среднее время одного вызова: повторяем, пока суммарное время не превысит min_seconds.
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        for base, exponent, modulus in args:
+            function(base, exponent, modulus)
+        calls += len(args)
+        seconds = time.perf_counter() - started
+        if seconds >= min_seconds:
+            return seconds / calls
+
+
+def make_operands(bits, count, rng):
+    # Нечётный модуль ровно bits бит, основание меньше модуля, показатель той же длины (как d в RSA).
+    operands = []
+    for _ in range(count):
+        modulus = rng.getrandbits(bits) | (1 << bits - 1) | 1
+        operands.append((rng.randrange(2, modulus), rng.getrandbits(bits) | (1 << bits - 1), modulus))
+    return operands
+
+
+def run_benchmark(sizes=(256, 512, 1024, 2048, 4096), backends=tuple(RSA.POW_BACKENDS), count=4,
+                  min_seconds=0.2, seed=0):
+    # Для каждого размера операндов: проверка, что все способы дают одинаковый результат,
+    # затем время одного возведения в степень для каждого способа.
+    rng = random.Random(seed)
+    results = []
+    for bits in sizes:
+        operands = make_operands(bits, count, rng)
+        expected = [pow(*args) for args in operands]
+        row = {"bits": bits, "seconds": {}}
+        for name in backends:
+            function = RSA.POW_BACKENDS[name]
+            if [function(*args) for args in operands] != expected:
+                raise AssertionError(f"{name}: результат не совпал со встроенным pow ({bits} бит)")
+            row["seconds"][name] = time_call(function, operands, min_seconds)
+        row["fastest"] = min(row["seconds"], key=row["seconds"].get)
+        results.append(row)
+        print(f"{bits:>5} бит: " + "  ".join(f"{name} {seconds * 1e3:9.3f} мс"
+                                            for name, seconds in row["seconds"].items()), file=sys.stderr)
+    return {
+        "python": sys.version.split()[0],
+        "default": RSA.pow_backend,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение способов возведения в степень по модулю")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 512, 1024, 2048, 4096],
+                        help="размеры модуля и показателя в битах")
+    parser.add_argument("--backends", nargs="+", default=list(RSA.POW_BACKENDS), choices=list(RSA.POW_BACKENDS),
+                        help="способы возведения в степень")
+    parser.add_argument("--count", type=int, default=4, help="наборов операндов на размер")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="минимальное время замера одного способа")
+    parser.add_argument("--seed", type=int, default=0, help="seed генератора операндов")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию — стандартный вывод)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.backends, args.count, args.min_seconds, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
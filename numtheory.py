@@ -0,0 +1,94 @@
+import math
+
+# Функция расширенного алгоритма Евклида (итеративная: без рекурсии и ограничения глубины).
+# Возвращает (НОД(a, b), x, y), где a*x + b*y = НОД(a, b)
+def extended_gcd(a, b):
+    x0, y0, x1, y1 = 1, 0, 0, 1  # Инвариант: a0*x0 + b0*y0 = a, a0*x1 + b0*y1 = b
+    while b:
+        q, r = divmod(a, b)
+        a, b = b, r
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return a, x0, y0
+
+# Функция вычисления обратного элемента a^{-1} mod m
+def mod_inverse(a, m):
+    g, x, y = extended_gcd(a % m, m)
+    if g != 1:
+        raise ValueError("Обратного элемента не существует")
+    return x % m
+
+# Функция вычисления НОД двоичным алгоритмом (только сдвиги и вычитания)
+def binary_gcd(a, b):
+    a, b = abs(a), abs(b)
+    if not a or not b:
+        return a | b
+    shift = ((a | b) & -(a | b)).bit_length() - 1  # Общая степень двойки
+    a >>= (a & -a).bit_length() - 1
+    while b:
+        b >>= (b & -b).bit_length() - 1  # Убираем двойки из b, a всегда нечётно
+        if a > b:
+            a, b = b, a
+        b -= a
+    return a << shift
+
+# Функция вычисления НОД алгоритмом Лемера: шаги Евклида выполняются над старшими 64 битами
+# чисел, и только накопленная матрица 2x2 применяется к длинным числам
+def lehmer_gcd(a, b, digit_bits=64):
+    a, b = abs(a), abs(b)
+    if a < b:
+        a, b = b, a
+    while b >> digit_bits:
+        shift = a.bit_length() - digit_bits
+        x, y = a >> shift, b >> shift  # Старшие цифры
+        A, B, C, D = 1, 0, 0, 1
+        # Частные совпадают с частными для длинных чисел, пока верны оба условия Коллинза
+        while y + C and y + D:
+            q = (x + A) // (y + C)
+            if q != (x + B) // (y + D):
+                break
+            A, B, x, C, D, y = C, D, y, A - q * C, B - q * D, x - q * y
+        if B:
+            a, b = A * a + B * b, C * a + D * b
+        else:  # Ни одного шага по старшим цифрам — обычный шаг Евклида
+            a, b = b, a % b
+    while b:  # Короткие числа добивает обычный алгоритм Евклида
+        a, b = b, a % b
+    return a
+
+# Функция вычисления символа Якоби (a/n) для нечётного n > 0
+def jacobi(a, n):
+    if n <= 0 or not n & 1:
+        raise ValueError("Символ Якоби определён только для нечётного n > 0")
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:  # (2/n) = -1 при n = 3, 5 (mod 8)
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a  # Квадратичный закон взаимности
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+# Функция вычисления НОД: math.gcd — тот же алгоритм Лемера, реализованный на C
+gcd = math.gcd
+
+# Функция пакетного обращения (приём Монтгомери): n обратных по модулю m за одно обращение
+# и 3(n - 1) умножений. Если хотя бы один элемент необратим — ValueError
+def batch_inverse(values, m):
+    values = [value % m for value in values]
+    if not values:
+        return []
+    prefix = [values[0]]  # prefix[i] = values[0] * ... * values[i] mod m
+    for value in values[1:]:
+        prefix.append(prefix[-1] * value % m)
+    inverse = mod_inverse(prefix[-1], m)  # (values[0] * ... * values[n-1])^{-1}
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = inverse * prefix[i - 1] % m  # values[i]^{-1}
+        inverse = inverse * values[i] % m        # (values[0] * ... * values[i-1])^{-1}
+    result[0] = inverse
+    return result
@@ -1,66 +1,62 @@
+from numtheory import mod_inverse
+
+
 # Функция для нахождения обратного элемента a^{-1} mod m (a * x ≡ 1 mod m)
+# (итеративный расширенный алгоритм Евклида из numtheory; ValueError, если обратного нет)
 def modinv(a, m):
-    # Внутренняя функция: расширенный алгоритм Евклида
-    # Возвращает (НОД(a, b), x, y), где a*x + b*y = НОД(a, b)
-    def egcd(a, b):
-        if a == 0:
-            return (b, 0, 1)  # База рекурсии: если a = 0, НОД = b, x = 0, y = 1
-        else:
-            # Рекурсивный вызов для b % a и a
-            g, y, x = egcd(b % a, a)
-            # Обновление коэффициентов: x' = x - (b//a)*y, y' = y
-            return (g, x - (b // a) * y, y)
-
-    # Вычисление НОД и коэффициентов
-    g, x, y = egcd(a, m)
-    # Если НОД ≠ 1, обратного элемента не существует
-    if g != 1:
-        raise Exception('modular inverse does not exist')
-    else:
-        # Возвращаем x % m как обратный элемент
-        return x % m
-
-
-# Алгоритм 1.2 для вычисления xR mod N (Замечание 2)
+    return mod_inverse(a, m)
+
+
+# Контекст Монтгомери для модуля N, основания beta и числа разрядов n (R = beta^n).
+# Всё, что не зависит от множителей, считается один раз: R, R^2 mod N и (-N)^{-1} mod beta
+class MontgomeryContext:
+    def __init__(self, N, beta, n):
+        # Проверка, что -N % beta и beta взаимно просты
+        from math import gcd
+        if gcd(-N % beta, beta) != 1:
+            raise Exception(f'Параметры не подходят: -N % beta = {-N % beta} и beta = {beta} не взаимно просты')
+        self.N = N
+        self.beta = beta
+        self.n = n
+        self.R = beta ** n            # R = beta^n
+        self.R2 = (self.R * self.R) % N  # R^2 mod N
+        self.N_inv = modinv(-N % beta, beta)  # (-N % beta)^{-1} mod beta
+
+    # Произведение Монтгомери x * y * R^{-1} mod N (шаги 1, 4 и 5 алгоритма 1.2)
+    def mul(self, x, y):
+        beta, N, N_inv = self.beta, self.N, self.N_inv
+        z = 0  # Начальное значение z
+        for _ in range(self.n):
+            x_i = x % beta  # Очередная цифра x в системе счисления с основанием beta
+            x //= beta
+            # u = (z + x_i * y) % beta, v = u * (-N % beta)^{-1} mod beta
+            v = ((z + x_i * y) % beta * N_inv) % beta
+            # z = (z + x_i * y + v * N) // beta
+            z = (z + x_i * y + v * N) // beta
+        return z % N  # Приведение результата по модулю N
+
+    # Квадрат Монтгомери x * x * R^{-1} mod N
+    def sqr(self, x):
+        return self.mul(x, x)
+
+    # Перевод в представление Монтгомери: φ_R^{-1}(x) = xR mod N
+    def to_mont(self, x):
+        return self.mul(x, self.R2)
+
+    # Обратный перевод: xR^{-1} mod N
+    def from_mont(self, x):
+        return self.mul(x, 1)
+
+
+# Алгоритм 1.2 для вычисления xyR^{-1} mod N (Замечание 2).
+# Для многих вызовов с одним модулем выгоднее один раз создать MontgomeryContext
 def algorithm_1_2(x, y, N, beta, n):
-    # Шаг 1: Разложение x на цифры в системе счисления с основанием beta
-    x_digits = []
-    temp = x
-    for _ in range(n):
-        x_digits.append(temp % beta)  # Получаем младшую цифру
-        temp //= beta  # Удаляем младшую цифру
-
-    # Шаг 2: Проверка, что -N % beta и beta взаимно просты
-    from math import gcd
-    if gcd(-N % beta, beta) != 1:
-        raise Exception(f'Параметры не подходят: -N % beta = {-N % beta} и beta = {beta} не взаимно просты')
-
-    # Шаг 3: Вычисление обратного элемента (-N % beta)^{-1} mod beta
-    N_inv = modinv(-N % beta, beta)
-
-    # Шаг 4: Итеративное вычисление z
-    z = 0  # Начальное значение z
-    for i in range(n):
-        # u = (z + x_i * y) % beta
-        u = (z + x_digits[i] * y) % beta
-        # v = u * (-N % beta)^{-1} mod beta
-        v = (u * N_inv) % beta
-        # z = (z + x_i * y + v * N) // beta
-        z = (z + x_digits[i] * y + v * N) // beta
-
-    # Шаг 5: Приведение результата по модулю N
-    z = z % N
-    return z
+    return MontgomeryContext(N, beta, n).mul(x, y)
 
 
 # Функция для вычисления φ_R^{-1}(x) = xR mod N
 def phi_R_inv(x, N, beta, n):
-    # R = beta^n
-    R = beta ** n
-    # R^2 mod N (используется как y в algorithm_1_2)
-    R2 = (R * R) % N
-    # Вызов algorithm_1_2 для вычисления xR mod N
-    return algorithm_1_2(x, R2, N, beta, n)
+    return MontgomeryContext(N, beta, n).to_mont(x)
 
 
 # Пример использования с развернутым выводом